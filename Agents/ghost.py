@@ -2,8 +2,10 @@
 from __future__ import annotations
 from abc import ABC, abstractmethod
 from typing import Tuple, List, Optional, Dict
+import logging
 import random
-import pyglet
+
+logger = logging.getLogger(__name__)
 
 # Тип позиції
 RC = Tuple[int, int]
@@ -108,9 +110,8 @@ class GhostStateChaseDirect(GhostStateBaseMove):
 
         old = (ghost.x, ghost.y)
         target = map.pacman_position
-        path = map.bfs(old, target, map.get_free_neighbours_for_ghost)
-        if len(path) > 1:
-            new = path[1]
+        new = map.next_step_for_ghost(old, target)
+        if new is not None:
             self._set_dir_from_step(ghost, old, new)
             ghost.x, ghost.y = new
 
@@ -145,9 +146,8 @@ class GhostStateAmbush(GhostStateBaseMove):
 
         old = (ghost.x, ghost.y)
         target = self._ahead_of_pac(map, 2)
-        path = map.bfs(old, target, map.get_free_neighbours_for_ghost)
-        if len(path) > 1:
-            new = path[1]
+        new = map.next_step_for_ghost(old, target)
+        if new is not None:
             self._set_dir_from_step(ghost, old, new)
             ghost.x, ghost.y = new
 
@@ -185,9 +185,8 @@ class GhostStateCutOff(GhostStateBaseMove):
 
         old = (ghost.x, ghost.y)
         target = self._pick_cut(map)
-        path = map.bfs(old, target, map.get_free_neighbours_for_ghost)
-        if len(path) > 1:
-            new = path[1]
+        new = map.next_step_for_ghost(old, target)
+        if new is not None:
             self._set_dir_from_step(ghost, old, new)
             ghost.x, ghost.y = new
 
@@ -247,9 +246,8 @@ class GhostStateShy(GhostStateBaseMove):
                     return
                 target = map.pacman_position
 
-        path = map.bfs(old, target, map.get_free_neighbours_for_ghost)
-        if len(path) > 1:
-            new = path[1]
+        new = map.next_step_for_ghost(old, target)
+        if new is not None:
             self._set_dir_from_step(ghost, old, new)
             ghost.x, ghost.y = new
 
@@ -271,8 +269,7 @@ class Ghost:
     """
     ROLE_BY_INDEX = {0: "blinky", 1: "pinky", 2: "inky", 3: "clyde"}
 
-    def __init__(self, sprites, n: int, role: Optional[str] = None) -> None:
-        self.sprites = sprites
+    def __init__(self, n: int, role: Optional[str] = None) -> None:
         self.n = n
         self.role = (role or self.ROLE_BY_INDEX.get(n % 4, "blinky")).lower()
         self.difficulty = 1
@@ -351,17 +348,6 @@ class Ghost:
             # не зрушив — збережемо напрямок як був
             pass
 
-    def on_draw(self, tile_size):
-        current_sprite = self.sprites[self.current_direction]
-        current_sprite.x = self.x * tile_size
-        current_sprite.y = self.y * tile_size
-        number = pyglet.text.Label(
-            str(self.n), font_name='Times New Roman', font_size=12,
-            x=self.x * tile_size, y=self.y * tile_size
-        )
-        current_sprite.draw()
-        number.draw()
-
     def caught_pacman(self):
         self.did_catch_pacman = True
-        print(f"GHOST {self.n} ({self.role}) CAUGHT PACMAN")
+        logger.debug("ghost %d (%s) caught pacman", self.n, self.role)
@@ -1,6 +1,9 @@
 from abc import abstractmethod, ABC
+import logging
 import random 
 
+logger = logging.getLogger(__name__)
+
 class PacmanState(ABC):
     @abstractmethod
     def move(self, pacman, map):
@@ -33,7 +36,7 @@ class PacmanStateBaseMove(PacmanState):
                 self.prev_position = (pacman.x, pacman.y)
                 pacman.x, pacman.y = new_x, new_y
             else:
-                print("PACMAN STUCK")
+                logger.debug("pacman stuck at %s", (pacman.x, pacman.y))
                 pacman.die()
         
         map.pacman_position = (pacman.x, pacman.y)
@@ -51,13 +54,13 @@ class PacmanStateMove(PacmanStateBaseMove):
 
     def move(self, pacman, map):
         current_x, current_y = pacman.x, pacman.y
-        apple = map.get_best_apple((current_x, current_y), map.get_pacman_cost)
+        apple = map.get_best_apple((current_x, current_y))
         pacman.current_target = apple
         if apple is not None:
-            path = map.dijkstra((current_x, current_y), apple, map.get_pacman_cost)
-            if len(path) > 1:
-                pacman.path = path[1:]
-                pacman.x, pacman.y = path[1]
+            result = map.find_path((current_x, current_y), apple, map.get_pacman_cost)
+            if result.reachable and len(result.path) > 1:
+                pacman.path = result.path[1:]
+                pacman.x, pacman.y = result.path[1]
                 self.did_move = True
             else:
                 pacman.path = None
@@ -69,9 +72,8 @@ class PacmanStateMove(PacmanStateBaseMove):
 
 
 class Pacman:
-    def __init__(self, sprites, lives = 3) -> None:
+    def __init__(self, lives = 3) -> None:
         self.max_lives = lives
-        self.sprites = sprites
 
         self.restore()
 
@@ -107,13 +109,6 @@ class Pacman:
             self.current_direction = 3
         
 
-    def on_draw(self, tile_size):
-        current_sprite = self.sprites[self.current_direction]
-
-        current_sprite.x = self.x * tile_size
-        current_sprite.y = self.y * tile_size
-        current_sprite.draw()
-
     def get_score(self):
         return self.score
     
@@ -0,0 +1,137 @@
+import numpy as np
+
+# порядок сусідів той самий, що був у Map.get_free_neighbours
+NEIGHBOUR_ORDER = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+
+class AdjacencyIndex:
+    """
+    Статичний індекс сусідства у форматі CSR: сусіди клітинки i (індекс x * size + y) —
+    це neighbours[offsets[i]:offsets[i + 1]]. Будується один раз після генерації стін.
+    neighbour_cells[i] — ті самі сусіди готовими кортежами (x, y), щоб запити нічого не виділяли.
+    """
+
+    def __init__(self, walls) -> None:
+        self.size = walls.shape[0]
+        size = self.size
+        open_cells = walls == 0
+        # індекси всіх прохідних клітинок у порядку рядків
+        self.open_cells = np.flatnonzero(open_cells.reshape(-1)).tolist()
+
+        xs, ys = np.indices(walls.shape)
+        candidates = []
+        for dx, dy in NEIGHBOUR_ORDER:
+            nx, ny = xs + dx, ys + dy
+            inside = (nx >= 0) & (nx < size) & (ny >= 0) & (ny < size)
+            valid = np.zeros(walls.shape, dtype=bool)
+            valid[inside] = open_cells[nx[inside], ny[inside]]
+            valid &= open_cells
+            candidates.append(np.where(valid, nx * size + ny, -1).reshape(-1))
+
+        # (cells, 4) у порядку NEIGHBOUR_ORDER; -1 — немає сусіда
+        candidates = np.stack(candidates, axis=1)
+        present = candidates >= 0
+        self.degree = present.sum(axis=1).astype(np.int32)
+        self.offsets = np.zeros(size * size + 1, dtype=np.int32)
+        np.cumsum(self.degree, out=self.offsets[1:])
+        self.neighbours = candidates[present].astype(np.int32)
+
+        flat = self.neighbours.tolist()
+        offsets = self.offsets.tolist()
+        self.neighbour_indices = [tuple(flat[offsets[i]:offsets[i + 1]]) for i in range(size * size)]
+        self.neighbour_cells = [tuple(divmod(n, size) for n in neighbours) for neighbours in self.neighbour_indices]
+
+
+class OccupancyOverlay:
+    """
+    Динамічний шар поверх AdjacencyIndex: скільки сутностей стоїть на кожній клітинці
+    і скільки зайнятих сусідів має кожна клітинка. Оновлюється, коли сутність рухається,
+    тож Map.get_free_neighbours фільтрує лише там, де поруч справді хтось є.
+
+    Для спавну — дерево Фенвіка над прохідними клітинками (1 — ніким не зайнята):
+    випадкова вільна клітинка знаходиться за O(log n) без повторних спроб, а вибір
+    залежить лише від того, хто де стоїть, а не від історії ходів (важливо для повторів).
+    """
+
+    def __init__(self, adjacency: AdjacencyIndex) -> None:
+        self.adjacency = adjacency
+        self.size = adjacency.size
+        self.occupied = [0] * (self.size * self.size)
+        self.blocked_near = [0] * (self.size * self.size)
+
+        self.open_cells = adjacency.open_cells
+        self.slot = [-1] * (self.size * self.size)
+        for slot, cell in enumerate(self.open_cells):
+            self.slot[cell] = slot
+        self.free_count = len(self.open_cells)
+        # дерево з усіх одиниць: вузол i покриває i & -i клітинок
+        self.free_tree = [0] + [i & -i for i in range(1, self.free_count + 1)]
+
+    def _index(self, position):
+        if not isinstance(position, tuple):
+            return None
+        return position[0] * self.size + position[1]
+
+    def _update_free(self, index, delta) -> None:
+        slot = self.slot[index]
+        if slot < 0:
+            return
+        self.free_count += delta
+        tree, i = self.free_tree, slot + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def add(self, position) -> None:
+        index = self._index(position)
+        if index is None:
+            return
+        self.occupied[index] += 1
+        if self.occupied[index] == 1:
+            for neighbour in self.adjacency.neighbour_indices[index]:
+                self.blocked_near[neighbour] += 1
+            self._update_free(index, -1)
+
+    def remove(self, position) -> None:
+        index = self._index(position)
+        if index is None:
+            return
+        self.occupied[index] -= 1
+        if self.occupied[index] == 0:
+            for neighbour in self.adjacency.neighbour_indices[index]:
+                self.blocked_near[neighbour] -= 1
+            self._update_free(index, 1)
+
+    def move(self, old, new) -> None:
+        if old == new:
+            return
+        self.remove(old)
+        self.add(new)
+
+    def is_occupied(self, position) -> bool:
+        return self.occupied[position[0] * self.size + position[1]] > 0
+
+    def free_neighbours(self, x, y):
+        index = x * self.size + y
+        neighbours = self.adjacency.neighbour_cells[index]
+        if self.blocked_near[index] == 0:
+            return neighbours
+        occupied, size = self.occupied, self.size
+        return tuple(p for p in neighbours if occupied[p[0] * size + p[1]] == 0)
+
+    def nth_free_cell(self, k):
+        """k-та (з 0, у порядку рядків) прохідна клітинка, на якій ніхто не стоїть."""
+        tree = self.free_tree
+        position, step = 0, 1 << (len(tree) - 1).bit_length()
+        while step:
+            nxt = position + step
+            if nxt < len(tree) and tree[nxt] <= k:
+                position = nxt
+                k -= tree[nxt]
+            step >>= 1
+        return divmod(self.open_cells[position], self.size)
+
+    def random_free_cell(self, rng):
+        if self.free_count == 0:
+            raise ValueError("no free cell left on the map")
+        return self.nth_free_cell(rng.randrange(self.free_count))
@@ -0,0 +1,164 @@
+from collections import deque
+from typing import List, Optional, Set, Tuple
+
+import numpy as np
+
+from Game.adjacency import AdjacencyIndex
+from Game.cost_field import APPLES_DEPTH, count_apples_within
+
+# відстань до яблука з клітинки, з якої жодного яблука не досягти (або зі стіни)
+NO_APPLE = 1 << 30
+
+
+class AppleIndex:
+    """
+    Інкрементальний індекс яблук: лічильники за типом, множина позицій і поле відстаней
+    від кожної клітинки до найближчого яблука по лабіринті (BFS з усіх яблук одразу).
+    Коли яблуко з'їдено, поле перераховується лише в області, для якої саме це яблуко
+    було найближчим; restore повертає знімок початкового стану без нового BFS.
+
+    within[i] — скільки яблук у межах radius кроків від клітинки i (без неї самої) по стінах,
+    без урахування привидів; з'їдене яблуко зменшує його лише в кулі radius навколо себе.
+    """
+
+    def __init__(self, adjacency: AdjacencyIndex, apple_map, radius: int = APPLES_DEPTH) -> None:
+        self.adjacency = adjacency
+        self.size = adjacency.size
+        self.radius = radius
+
+        self._initial_counts = [0, 0, 0]
+        self._initial_positions: Set[Tuple[int, int]] = set()
+        for x, y in np.argwhere(apple_map > 0):
+            apple = int(apple_map[x, y])
+            self._initial_counts[apple] += 1
+            self._initial_positions.add((int(x), int(y)))
+        self._initial_distance = self._build_distance(self._initial_positions)
+        # клітинка без сусідів нічого не досягає, тож для лічби вистачає degree > 0
+        free = (adjacency.degree > 0).reshape(self.size, self.size)
+        self._initial_within = np.where(free, count_apples_within(free, apple_map > 0, radius), 0).reshape(-1).tolist()
+
+        self.restore()
+
+    def restore(self) -> None:
+        self.counts: List[int] = list(self._initial_counts)
+        self.total = self.counts[1] + self.counts[2]
+        self.positions: Set[Tuple[int, int]] = set(self._initial_positions)
+        self.distance: List[int] = list(self._initial_distance)
+        self.within: List[int] = list(self._initial_within)
+
+    def _build_distance(self, positions) -> List[int]:
+        size, neighbour_indices = self.size, self.adjacency.neighbour_indices
+        distance = [NO_APPLE] * (size * size)
+        queue = deque()
+        for x, y in positions:
+            distance[x * size + y] = 0
+            queue.append(x * size + y)
+        while queue:
+            current = queue.popleft()
+            step = distance[current] + 1
+            for neighbour in neighbour_indices[current]:
+                if distance[neighbour] > step:
+                    distance[neighbour] = step
+                    queue.append(neighbour)
+        return distance
+
+    def is_empty(self) -> bool:
+        return self.total == 0
+
+    def count(self, apple_type: int) -> int:
+        return self.counts[apple_type]
+
+    def remove(self, x: int, y: int, apple_type: int) -> None:
+        """Яблуко в (x, y) з'їдено: оновити лічильники й поле відстаней навколо нього."""
+        if (x, y) not in self.positions:
+            return
+        self.positions.remove((x, y))
+        self.counts[apple_type] -= 1
+        self.total -= 1
+        self._remove_source(x * self.size + y)
+        within = self.within
+        for cell in self._ball(x * self.size + y):
+            within[cell] -= 1
+
+    def _ball(self, source: int) -> List[int]:
+        """Клітинки в межах radius кроків від source, без неї самої."""
+        neighbour_indices = self.adjacency.neighbour_indices
+        seen = {source}
+        frontier = [source]
+        for _ in range(self.radius):
+            next_frontier = []
+            for current in frontier:
+                for neighbour in neighbour_indices[current]:
+                    if neighbour not in seen:
+                        seen.add(neighbour)
+                        next_frontier.append(neighbour)
+            frontier = next_frontier
+        seen.remove(source)
+        return list(seen)
+
+    def _remove_source(self, source: int) -> None:
+        distance, neighbour_indices = self.distance, self.adjacency.neighbour_indices
+
+        # 1. клітинки, у яких хоча б один найкоротший шлях веде до source
+        #    (нащадки source у DAG найкоротших шляхів); лише їхні відстані можуть зрости
+        affected = [source]
+        in_affected = {source}
+        i = 0
+        while i < len(affected):
+            current = affected[i]
+            i += 1
+            step = distance[current] + 1
+            for neighbour in neighbour_indices[current]:
+                if distance[neighbour] == step and neighbour not in in_affected:
+                    in_affected.add(neighbour)
+                    affected.append(neighbour)
+
+        # 2. межа області: найкраща відстань через сусідів, яких видалення не зачепило
+        for current in affected:
+            distance[current] = NO_APPLE
+        buckets = {}
+        for current in affected:
+            best = NO_APPLE
+            for neighbour in neighbour_indices[current]:
+                if neighbour not in in_affected and distance[neighbour] + 1 < best:
+                    best = distance[neighbour] + 1
+            if best < NO_APPLE:
+                distance[current] = best
+                buckets.setdefault(best, []).append(current)
+
+        # 3. BFS усередині області, рівень за рівнем (ваги одиничні — вистачає кошиків)
+        frontier, level = [], 0
+        while frontier or buckets:
+            if not frontier:
+                level = min(buckets)
+                frontier = buckets.pop(level)
+            next_frontier = buckets.pop(level + 1, [])
+            for current in frontier:
+                if distance[current] != level:
+                    continue
+                for neighbour in neighbour_indices[current]:
+                    if neighbour in in_affected and distance[neighbour] > level + 1:
+                        distance[neighbour] = level + 1
+                        next_frontier.append(neighbour)
+            frontier = next_frontier
+            level += 1
+
+    def apples_within(self, position) -> int:
+        return self.within[position[0] * self.size + position[1]]
+
+    def distance_to_apple(self, position) -> int:
+        return self.distance[position[0] * self.size + position[1]]
+
+    def nearest_apple(self, position) -> Optional[Tuple[int, int]]:
+        """Найближче за лабіринтом яблуко: спуск полем відстаней, O(відстань)."""
+        size, distance, neighbour_indices = self.size, self.distance, self.adjacency.neighbour_indices
+        current = position[0] * size + position[1]
+        if distance[current] >= NO_APPLE:
+            return None
+        while distance[current] > 0:
+            step = distance[current] - 1
+            for neighbour in neighbour_indices[current]:
+                if distance[neighbour] == step:
+                    current = neighbour
+                    break
+        return divmod(current, size)
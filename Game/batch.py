@@ -0,0 +1,74 @@
+import argparse
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from Game.game import create_game
+from Game.map_corpus import MapCorpus
+
+DEFAULT_MAX_TICKS = 60 * 60 * 10  # 10 хвилин гри при 60 кадрах/с
+
+
+def run_game(seed, map_size=20, number_of_ghosts=4, lives=5, max_ticks=DEFAULT_MAX_TICKS, corpus=None):
+    """
+    Зіграти одну гру без вікна: до втрати всіх життів Pacman.max_lives або до max_ticks кадрів.
+    З corpus (шлях до корпусу карт) карта для seed береться з файлу замість генерації — гра та сама.
+    """
+    started = time.perf_counter()
+    layout = None
+    if corpus is not None:
+        corpus = MapCorpus(corpus)
+        i = corpus.index_of_seed(seed)
+        if i is not None:
+            layout = corpus.layout(i)
+            map_size = corpus.size
+    game = create_game(map_size, number_of_ghosts, lives, seed=seed, layout=layout)
+    game.restart_on_game_over = False
+
+    ticks = 0
+    while not game.is_over and ticks < max_ticks:
+        game.tick()
+        ticks += 1
+
+    return {
+        "seed": seed,
+        "score": game.get_total_score(),
+        "level": game.difficulty,
+        "deaths": game.deaths,
+        "ticks": ticks,
+        "game_over": game.is_over,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def run_batch(seeds, map_size=20, number_of_ghosts=4, lives=5, max_ticks=DEFAULT_MAX_TICKS, workers=None,
+              corpus=None):
+    """Роздати ігри по процесах і віддавати результати в міру завершення (не в порядку seeds)."""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_game, seed, map_size, number_of_ghosts, lives, max_ticks, corpus)
+                   for seed in seeds]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетний прогін незалежних ігор Pacman без вікна")
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0, help="seed першої гри; далі seed + i")
+    parser.add_argument("--workers", type=int, default=None, help="кількість процесів (за замовчуванням — усі ядра)")
+    parser.add_argument("--map-size", type=int, default=20)
+    parser.add_argument("--ghosts", type=int, default=4)
+    parser.add_argument("--lives", type=int, default=5)
+    parser.add_argument("--max-ticks", type=int, default=DEFAULT_MAX_TICKS)
+    parser.add_argument("--corpus", help="корпус карт (python -m Game.map_corpus); seed-и, яких там немає, генеруються")
+    args = parser.parse_args(argv)
+
+    seeds = range(args.seed, args.seed + args.games)
+    # один JSON-рядок на гру — результати можна читати потоком
+    for result in run_batch(seeds, args.map_size, args.ghosts, args.lives, args.max_ticks, args.workers,
+                            args.corpus):
+        print(json.dumps(result), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import time
+
+# логічний кадр гри: Game.update рахує швидкості привидів і Pacman у кадрах по 1/60 с
+TICKS_PER_SECOND = 60
+# множник None — «без обмежень»: стільки тіків, скільки влазить у бюджет кадру
+UNBOUNDED = None
+SPEEDS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, UNBOUNDED)
+# частка кадру 1/60 с, яку віддаємо симуляції; решта — рендеру й подіям вікна
+TICK_BUDGET = 0.75 / 60.0
+# після зависання вікна не доганяємо пропущене — максимум стільки секунд гри за кадр
+MAX_FRAME_DT = 0.1
+
+
+class SimulationClock:
+    """
+    Прискорена симуляція, відв'язана від частоти кадрів: за кожен кадр вікна виконує
+    dt * 60 * speed логічних тіків Game.tick. Швидкості сутностей задані в тіках,
+    тож їхнє співвідношення не змінюється; рендерер малює лише останній стан.
+    Якщо тіки не вкладаються в бюджет кадру, борг відкидається — фактична швидкість
+    (ticks_per_second) тоді нижча за обрану, але вікно не зависає.
+    """
+
+    def __init__(self, game, speed=1, tick_budget=TICK_BUDGET) -> None:
+        self.game = game
+        self.speed = speed
+        self.tick_budget = tick_budget
+        self.owed = 0.0
+
+        self.ticks_last_frame = 0
+        self.ticks_per_second = 0.0
+        self._window_ticks = 0
+        self._window_seconds = 0.0
+
+    @property
+    def label(self) -> str:
+        return "x∞" if self.speed is UNBOUNDED else f"x{self.speed}"
+
+    def set_speed(self, speed) -> None:
+        self.speed = speed
+        self.owed = 0.0
+
+    def faster(self) -> None:
+        i = SPEEDS.index(self.speed) if self.speed in SPEEDS else 0
+        self.set_speed(SPEEDS[min(i + 1, len(SPEEDS) - 1)])
+
+    def slower(self) -> None:
+        i = SPEEDS.index(self.speed) if self.speed in SPEEDS else 1
+        self.set_speed(SPEEDS[max(i - 1, 0)])
+
+    def advance(self, dt) -> int:
+        """Прокрутити гру на dt секунд реального часу; повертає кількість виконаних тіків."""
+        game = self.game
+        dt = min(dt, MAX_FRAME_DT)
+        perf_counter = time.perf_counter
+        deadline = perf_counter() + self.tick_budget
+
+        if self.speed is UNBOUNDED:
+            wanted = None
+        else:
+            self.owed += dt * TICKS_PER_SECOND * self.speed
+            wanted = int(self.owed)
+
+        ticks = 0
+        while (wanted is None or ticks < wanted) and game.is_updating and not game.is_over:
+            # game.tick шукаємо щоразу: профайлер чи рекордер можуть підмінити його на льоту
+            game.tick()
+            ticks += 1
+            if perf_counter() >= deadline:
+                break
+
+        if wanted is None or ticks < wanted:
+            # пауза, кінець гри або вичерпаний бюджет — борг не накопичуємо
+            self.owed = 0.0
+        else:
+            self.owed -= ticks
+
+        self.ticks_last_frame = ticks
+        self._window_ticks += ticks
+        self._window_seconds += dt
+        if self._window_seconds >= 0.5:
+            self.ticks_per_second = self._window_ticks / self._window_seconds
+            self._window_ticks = 0
+            self._window_seconds = 0.0
+        return ticks
@@ -0,0 +1,88 @@
+import numpy as np
+
+# Ті самі константи, що й у покатковому Map.get_pacman_cost
+WALL_COST = 100000000
+GHOST_NEARBY_RADIUS = 2
+APPLES_DEPTH = 5
+
+DIRS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+
+
+def shifted(array, dx, dy):
+    """b[x, y] = array[x + dx, y + dy]; усе, що поза межами, — нулі."""
+    result = np.zeros_like(array)
+    n, m = array.shape
+    result[max(0, -dx):n - max(0, dx), max(0, -dy):m - max(0, dy)] = \
+        array[max(0, dx):n - max(0, -dx), max(0, dy):m - max(0, -dy)]
+    return result
+
+
+def count_apples_within(free, apples, depth=APPLES_DEPTH):
+    """
+    Для кожної клітинки s — скільки яблук досяжно з s не більше ніж за depth кроків,
+    ходячи лише вільними клітинками (те саме, що len(Map.get_bfs_apples(s))).
+
+    reach[ox + depth, oy + depth][s] — чи можна з s дійти до s + o за <= k кроків.
+    Крок: з s у сусіда s + d (він має бути вільним), далі з s + d до s + o.
+    Просторові осі мають рамку в 1 клітинку, тож зсуви — це просто зрізи.
+    """
+    n, m = free.shape
+    side = 2 * depth + 1
+    free_padded = np.pad(free, 1)
+    reach = np.zeros((side, side, n + 2, m + 2), dtype=bool)
+    reach[depth, depth, 1:n + 1, 1:m + 1] = True
+
+    for k in range(depth):
+        new_reach = reach.copy()
+        lo, hi = depth - k, depth + k + 1
+        for dx, dy in DIRS:
+            free_step = free_padded[1 + dx:n + 1 + dx, 1 + dy:m + 1 + dy]
+            source = reach[lo:hi, lo:hi, 1 + dx:n + 1 + dx, 1 + dy:m + 1 + dy]
+            new_reach[lo + dx:hi + dx, lo + dy:hi + dy, 1:n + 1, 1:m + 1] |= free_step & source
+        reach = new_reach
+
+    # windows[i, j] = apples[s + (i - depth, j - depth)]
+    windows = np.lib.stride_tricks.sliding_window_view(np.pad(apples, depth), (n, m))
+    counts = (reach[:, :, 1:n + 1, 1:m + 1] & windows).sum(axis=(0, 1))
+    # сама стартова клітинка не рахується
+    return counts - apples
+
+
+def compute_pacman_cost_field(walls, apple_map, ghosts_positions, pacman_position):
+    """
+    Векторизований Map.get_pacman_cost для всієї дошки одразу.
+    Будується з трьох масивів: відстані до привидів, відкритість клітинки та щільність яблук.
+    """
+    walls = walls == 1
+    free = ~walls
+    # get_free_neighbours не пускає на клітинки привидів і Pacman
+    for x, y in ghosts_positions:
+        free[x, y] = False
+    if isinstance(pacman_position, tuple):
+        free[pacman_position] = False
+
+    xs, ys = np.indices(walls.shape)
+    cost = np.zeros(walls.shape)
+    nearby_ghosts = np.zeros(walls.shape, dtype=int)
+
+    # how close is the position to ghosts
+    for ghost_x, ghost_y in ghosts_positions:
+        distance = np.abs(xs - ghost_x) + np.abs(ys - ghost_y)
+        cost += 2 / (distance + 1)
+        nearby_ghosts += distance <= GHOST_NEARBY_RADIUS
+    cost += 10 * nearby_ghosts
+
+    # how open is the position and ghost is near
+    free_neighbours = sum(shifted(free, dx, dy).astype(int) for dx, dy in DIRS)
+    cost += np.where(nearby_ghosts > 0, 0.5 / (free_neighbours + 1), 0)
+
+    # how many apples
+    apples = count_apples_within(free, apple_map > 0)
+    cost += 1 / (apples + 1)
+
+    # if position contains an apple
+    cost[apple_map == 1] /= 1.25
+    cost[apple_map == 2] /= 1.5
+
+    cost[walls] = WALL_COST
+    return cost
@@ -2,8 +2,8 @@ from Game.map import Map
 from typing import List
 from Agents.ghost import Ghost
 from Agents.pacman import Pacman
-import pyglet
 import math
+import random
 
 class Game:
     def __init__(self, map: Map, ghosts: List[Ghost], pacman: Pacman):
@@ -20,14 +20,22 @@ class Game:
         self.pacman = pacman
         self.ghosts = ghosts
 
-        self.show_pacman_costs = False
+        # статистика для пакетних прогонів
+        self.deaths = 0
+        self.banked_score = 0
+        self.is_over = False
+        # False — після втрати всіх життів гра зупиняється замість рестарту
+        self.restart_on_game_over = True
+        # MapPrefetcher: новий лабіринт на кожен рівень, зібраний заздалегідь у фоновому процесі
+        self.map_prefetcher = None
 
         self.start_game()
 
     def reset_positions(self):
         ghost_room_positions = self.map.get_ghost_room_positions()
         for i, ghost in enumerate(self.ghosts):
-            ghost.x, ghost.y = ghost_room_positions[i]
+            # привидів може бути більше, ніж клітинок кімнати — тоді вони стоять по кілька
+            ghost.x, ghost.y = ghost_room_positions[i % len(ghost_room_positions)]
 
         self.pacman.x, self.pacman.y = self.map.get_random_empty_space()
 
@@ -39,6 +47,7 @@ class Game:
         self.reset_positions()
 
         self.frame = 0
+        self.is_over = False
 
         self.points_target = self.points_target_base + (self.difficulty - 1) * self.points_target_step
         self.is_updating = True
@@ -54,86 +63,32 @@ class Game:
         self.start_game()
 
     def next_level(self):
+        self.banked_score += self.pacman.score
         self.difficulty += 1
+        if self.map_prefetcher is not None:
+            # не готова — ще один рівень на старому лабіринті, але без зависання кадру
+            next_map = self.map_prefetcher.take()
+            if next_map is not None:
+                self.replace_map(next_map)
         self.restart_game()
 
-    def get_free_neighbours(self, x, y):
-        neighbours = self.map.get_free_neighbours(x, y)
+    def replace_map(self, new_map: Map):
+        """Підмінити лабіринт; слухачі переходять на нову карту (далі restart_game шле on_map_restored)."""
+        new_map.listeners = self.map.listeners
+        self.map = new_map
+        for listener in new_map.listeners:
+            listener.on_map_replaced(new_map)
 
-        for ghost in self.ghosts:
-            if (ghost.x, ghost.y) in neighbours:
-                neighbours.remove((ghost.x, ghost.y))
-
-        neighbours.remove((self.pacman.x, self.pacman.y))
-
-    def on_draw(self, tile_size):
-        self.map.on_draw(tile_size)
-        for ghost in self.ghosts:
-            ghost.on_draw(tile_size)
-        self.pacman.on_draw(tile_size)
-
-        if self.show_pacman_costs:
-            for x, row in enumerate(self.map.map):
-                for y, tile in enumerate(row):
-                    if tile == 0:
-                        pacman_cost = round(self.map.get_pacman_cost((x, y)), 2)
-                        pyglet.text.Label(f"{pacman_cost}",
-                                        font_name='Arial',
-                                        font_size=8,
-                                        x=x * tile_size, y=y * tile_size).draw()
-            if self.pacman.path is not None:
-                for p in self.pacman.path:
-                    x, y = p
-                    pyglet.shapes.Circle(x * tile_size + tile_size // 2, y * tile_size + tile_size // 2, 5, color=(255, 0, 0)).draw()
-
-        if self.pacman.current_target is not None:
-            x, y = self.pacman.current_target
-            pyglet.shapes.Circle(x * tile_size + tile_size // 2, y * tile_size + tile_size // 2, 5, color=(0, 255, 0)).draw()
-
-        score = pyglet.text.Label(f"Score: {self.pacman.score}",
-                                  font_name='Arial',
-                                  font_size=16,
-                                  x=0, y=self.map.size * tile_size,
-                                  anchor_x='left', anchor_y='top')
-
-        lives = pyglet.text.Label(f"Lives: {self.pacman.lives}",
-                                  font_name='Arial',
-                                  font_size=16,
-                                  x=self.map.size * tile_size, y=self.map.size * tile_size,
-                                  anchor_x='right', anchor_y='top')
-
-        pacman_state_type = pyglet.text.Label(f"Pacman state: {self.pacman.state.__class__.__name__}",
-                                    font_name='Arial',
-                                    font_size=10,
-                                    x=0, y=self.map.size * tile_size - 18,
-                                    anchor_x='left', anchor_y='top')
-
-        difficulty = pyglet.text.Label(f"Difficulty: {self.difficulty}",
-                                    font_name='Arial',
-                                    font_size=10,
-                                    x=0, y=self.map.size * tile_size - 36,
-                                    anchor_x='left', anchor_y='top')
+    def get_total_score(self):
+        """Очки за всі пройдені рівні плюс поточний (score Pacman обнуляється з кожним рівнем)."""
+        return self.banked_score + self.pacman.score
 
-        for ghost in self.ghosts:
-            ghost_state = pyglet.text.Label(f"Ghost {ghost.n} state: {ghost.state.__class__.__name__}",
-                                    font_name='Arial',
-                                    font_size=10,
-                                    x=self.map.size * tile_size, y=self.map.size * tile_size - 18 * (ghost.n + 1),
-                                    anchor_x='right', anchor_y='top')
-            ghost_state.draw()
-
-        target = pyglet.text.Label(f"Target: {self.points_target}",
-                                   font_name='Arial',
-                                   font_size=10,
-                                   x=0, y=self.map.size * tile_size - 54,
-                                   anchor_x='left', anchor_y='top')
-        target.draw()
-
-
-        score.draw()
-        lives.draw()
-        pacman_state_type.draw()
-        difficulty.draw()
+    def tick(self, dt=1/60.0):
+        """Один логічний кадр симуляції — без вікна, vsync і pyglet."""
+        if not self.is_updating:
+            return
+        self.frame += 1
+        self.update(dt)
 
     def update(self, dt):
         if not self.is_updating:
@@ -143,13 +98,15 @@ class Game:
         if self.frame % 5 == 0:
             for i, ghost in enumerate(self.ghosts):
                 ghost.move(self.map)
-                self.map.ghosts_positions[i] = (ghost.x, ghost.y)
+                self.map.set_ghost_position(i, (ghost.x, ghost.y))
                 if ghost.did_catch_pacman:
                     self.pacman.die()
                     ghost.did_catch_pacman = False
                     return
 
         if self.frame % (60 // 20) == 0:
+            # вартості рахуємо раз на тік для всієї дошки, далі — лише читання
+            self.map.update_pacman_cost_field()
             self.pacman.move(self.map)
             self.map.pacman_position = (self.pacman.x, self.pacman.y)
             self.map.pacman_direction = getattr(self.pacman, "current_direction", 0)
@@ -163,8 +120,13 @@ class Game:
                 return
             if self.pacman.did_die:
                 self.pacman.lives -= 1
+                self.deaths += 1
                 if self.pacman.lives == 0:
-                    self.restart_game()
+                    if self.restart_on_game_over:
+                        self.restart_game()
+                    else:
+                        self.is_updating = False
+                        self.is_over = True
                 else:
                     self.pacman.restore_without_lives()
                     for ghost in self.ghosts:
@@ -172,3 +134,13 @@ class Game:
                     self.reset_positions()
 
 
+def create_game(map_size=20, number_of_ghosts=4, lives=5, seed=None, layout=None) -> Game:
+    """Зібрати гру без жодної графіки — рендерер за бажанням підключається зверху."""
+    game_map = Map(map_size, seed, layout)
+    if game_map.seed is not None:
+        # рух привидів і Pacman бере глобальний random — з seed гра відтворювана,
+        # і однакова для згенерованої та завантаженої з корпусу карти; Map сам його не чіпає
+        random.seed(game_map.seed)
+    ghosts = [Ghost(i) for i in range(number_of_ghosts)]
+    pacman = Pacman(lives)
+    return Game(game_map, ghosts, pacman)
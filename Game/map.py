@@ -1,108 +1,132 @@
+from typing import List, NamedTuple, Optional, Tuple
+
 import numpy as np
-import pyglet
-from Game.map_generator import MapGenerator
+from Game.map_generator import MapGenerator, label_components
+from Game.cost_field import compute_pacman_cost_field
+from Game.pathfinding import AStarSearch, BreadthFirstSearch, FlowField, FlowFieldCache, NextHopTable
+from Game.adjacency import AdjacencyIndex, OccupancyOverlay
+from Game.apple_index import AppleIndex
 import random 
 
-class MapImages:
-    def __init__(self, wall_image, small_apple_image, big_apple_image):
-        self.wall_image = wall_image
-        self.small_apple_image = small_apple_image
-        self.big_apple_image = big_apple_image
+class MapListener:
+    """Спостерігач за змінами карти (напр. рендерер). Ядро симуляції про pyglet не знає."""
+    def on_apple_eaten(self, x, y):
+        pass
 
-class Map:
-    def __init__(self, wall_image, small_apple_image, big_apple_image, size, tile_size):
-        self.map_images = MapImages(wall_image, small_apple_image, big_apple_image)
+    def on_map_restored(self):
+        pass
 
-        self.ghosts_positions = []
-        self.pacman_position = 0
+    def on_map_replaced(self, map):
+        """Game.replace_map: слухач переходить на новий лабіринт; одразу за цим прийде on_map_restored."""
+        pass
+
+class MapLayout(NamedTuple):
+    """Усе, що визначає карту до початку гри; саме це пишеться в корпус карт (Game/map_corpus.py)."""
+    seed: Optional[int]
+    walls: np.ndarray
+    apple_map: np.ndarray
+    dead_ends: List[Tuple[int, int]]
+    # необов'язкова таблиця NextHopTable (uint16 distance, uint8 direction)
+    distance: Optional[np.ndarray] = None
+    direction: Optional[np.ndarray] = None
+
+
+class Map:
+    # таблиця наступних кроків будується лише для карт не більших за цей розмір
+    NEXT_HOP_TABLE_MAX_SIZE = 64
+    # зв'язний за побудовою генератор: одна спроба, без перевірки й повторів
+    CONNECTED_GENERATION = True
+    # скільки байтів можуть займати закешовані FlowField (2 байти на клітинку карти за поле)
+    FLOW_FIELD_CACHE_BUDGET = 8 * 1024 * 1024
+
+    def __init__(self, size, seed=None, layout: Optional[MapLayout] = None):
+        self.listeners = []
+        # з seed генерація відтворювана; глобальний random гри сіє create_game, не Map
+        self.seed = seed if layout is None else layout.seed
+
+        self.occupancy = None
+        self._ghosts_positions = []
+        self._pacman_position = 0
+        self.pacman_cost_field = None
+        # get_bfs_apples за позицією; чиститься, щойно рушить сутність або зникне яблуко
+        self.bfs_apples_memo = {}
+        # FlowField за ціллю привидів (LRU); чиститься з restore_map і новими стінами
+        self.flow_fields = FlowFieldCache(self.FLOW_FIELD_CACHE_BUDGET)
 
         self.map = np.zeros((size, size))
         self.apple_map = np.zeros((size, size))
 
-        self.tile_size = tile_size
         self.size = size
-        self.generate()
+        self.path_search = AStarSearch(size)
+        self.breadth_first_search = BreadthFirstSearch(size)
+        self.dead_ends = []
+        self.next_hop_table = None
+        if layout is None:
+            self.generate()
+        else:
+            self.load_layout(layout)
 
         self.map_copy = self.map.copy()
         self.apple_map_copy = self.apple_map.copy()
 
-
-        self.init_sprites(tile_size, size)
+        # стіни після generate не змінюються — можна порахувати кроки між усіма парами
+        if self.next_hop_table is None and self.size <= self.NEXT_HOP_TABLE_MAX_SIZE:
+            self.next_hop_table = NextHopTable(self.map)
+
+        self.occupancy = OccupancyOverlay(self.adjacency)
+        self.apple_index = AppleIndex(self.adjacency, self.apple_map)
+
+    @property
+    def ghosts_positions(self):
+        return self._ghosts_positions
+
+    @ghosts_positions.setter
+    def ghosts_positions(self, positions):
+        self.bfs_apples_memo.clear()
+        if self.occupancy is not None:
+            for position in self._ghosts_positions:
+                self.occupancy.remove(position)
+            for position in positions:
+                self.occupancy.add(position)
+        self._ghosts_positions = positions
+
+    def set_ghost_position(self, i, position):
+        if self._ghosts_positions[i] != position:
+            self.bfs_apples_memo.clear()
+        if self.occupancy is not None:
+            self.occupancy.move(self._ghosts_positions[i], position)
+        self._ghosts_positions[i] = position
+
+    @property
+    def pacman_position(self):
+        return self._pacman_position
+
+    @pacman_position.setter
+    def pacman_position(self, position):
+        if self._pacman_position != position:
+            self.bfs_apples_memo.clear()
+        if self.occupancy is not None:
+            self.occupancy.move(self._pacman_position, position)
+        self._pacman_position = position
 
     def _is_fully_connected(self) -> bool:
         """Чи вся множина нулів (проходів) у одній компоненті?"""
-        import collections
-        h, w = self.map.shape
-        # знайдемо першу прохідну клітинку
-        start = None
-        for i in range(h):
-            for j in range(w):
-                if self.map[i, j] == 0:
-                    start = (i, j)
-                    break
-            if start:
-                break
-        if start is None:
-            return False  # немає жодної прохідної клітинки
-
-        seen = set([start])
-        q = collections.deque([start])
-        while q:
-            x, y = q.popleft()
-            for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
-                if 0 <= nx < h and 0 <= ny < w and self.map[nx, ny] == 0 and (nx, ny) not in seen:
-                    seen.add((nx, ny))
-                    q.append((nx, ny))
-
-        # перевіряємо, що всі нулі досяжні
-        total_open = int((self.map == 0).sum())
-        return len(seen) == total_open
-
-    def init_sprites(self, tile_size, size):
-        self.wall_sprites_batch = pyglet.graphics.Batch()
-        self.small_apple_sprites_batch = pyglet.graphics.Batch()
-        self.big_apple_sprites_batch = pyglet.graphics.Batch()
-        
-        wall_image, small_apple_image, big_apple_image = self.map_images.wall_image, self.map_images.small_apple_image, self.map_images.big_apple_image
-
-        self.wall_sprites = []
-        self.small_apple_sprites = []
-        self.big_apple_sprites = []
-        self.apple_sprites = [[None] * size for _ in range(size)]
-
-        for x, row in enumerate(self.map):
-            for y, tile in enumerate(row):
-                if tile == 1:
-                    wall_sprite = pyglet.sprite.Sprite(img=wall_image, batch=self.wall_sprites_batch)
-                    wall_sprite.x = x * tile_size
-                    wall_sprite.y = y * tile_size
-                    wall_sprite.width, wall_sprite.height = tile_size, tile_size
-                    self.wall_sprites.append(wall_sprite)
-
-        for x, row in enumerate(self.apple_map):
-            for y, tile in enumerate(row):
-                if tile == 1:
-                    apple_sprite = pyglet.sprite.Sprite(img=small_apple_image, batch=self.small_apple_sprites_batch)
-                    apple_sprite.x = x * tile_size
-                    apple_sprite.y = y * tile_size
-                    apple_sprite.width, apple_sprite.height = tile_size, tile_size
-                    self.apple_sprites[x][y] = apple_sprite
-                elif tile == 2:
-                    apple_sprite = pyglet.sprite.Sprite(img=big_apple_image, batch=self.big_apple_sprites_batch)
-                    apple_sprite.x = x * tile_size
-                    apple_sprite.y = y * tile_size
-                    apple_sprite.width, apple_sprite.height = tile_size, tile_size
-                    self.apple_sprites[x][y] = apple_sprite
-
+        _, count = label_components(self.map == 0)
+        return count == 1
 
     def restore_map(self):
         self.ghosts_positions = []
         self.pacman_position = None
+        self.pacman_cost_field = None
+        self.bfs_apples_memo.clear()
+        self.flow_fields.clear()
 
         self.map = self.map_copy.copy()
         self.apple_map = self.apple_map_copy.copy()
+        self.apple_index.restore()
 
-        self.init_sprites(self.tile_size, self.size)
+        for listener in self.listeners:
+            listener.on_map_restored()
 
     def get_ghost_room_positions(self):
         center = self.size // 2 - 1
@@ -110,39 +134,37 @@ class Map:
         return [(center + offset[0], center + offset[1]) for offset in offsets]
 
     def get_random_empty_space(self):
-        x = random.randint(0, self.size - 1)
-        y = random.randint(0, self.size - 1)
-        while self.map[x, y] == 1 or (x, y) in self.ghosts_positions or (x, y) == self.pacman_position:
-            x = random.randint(0, self.size - 1)
-            y = random.randint(0, self.size - 1)
-        return x, y
+        """Випадкова прохідна клітинка без привидів і Pacman — одна вибірка, без повторних спроб."""
+        return self.occupancy.random_free_cell(random)
 
     def try_eat_apple(self, x, y):
         apple = self.apple_map[x, y]
         self.apple_map[x, y] = 0
-        if self.apple_sprites[x][y]:
-            self.apple_sprites[x][y].delete()
-            self.apple_sprites[x][y] = None
+        if apple:
+            self.apple_index.remove(x, y, int(apple))
+            self.bfs_apples_memo.clear()
+            for listener in self.listeners:
+                listener.on_apple_eaten(x, y)
         return apple
 
     def generate(self):
-        # кілька спроб з різними випадковими станами
-        MAX_TRIES = 8
+        # старий режим: кілька спроб, кожна — свій seed генератора, виведений із seed карти
+        MAX_TRIES = 1 if self.CONNECTED_GENERATION else 8
+        rng = random.Random(self.seed)
         for attempt in range(MAX_TRIES):
-            self.map = np.zeros((self.size, self.size))
             room_positions = self.get_ghost_room_positions()
 
-            gen = MapGenerator(self.size)
-            # випадковий сид для різноманітності між спробами
-            random.seed()  # або random.seed(time.time_ns())
+            gen = MapGenerator(self.size, rng.getrandbits(64), connected=self.CONNECTED_GENERATION)
             candidate = gen.generate_map(room_positions)
 
             self.map = candidate
+            self.adjacency = AdjacencyIndex(self.map)
+            self.flow_fields.clear()
             self.apple_map = np.abs(np.ones((self.size, self.size)) - self.map)
 
-            dead_ends = self.find_dead_ends()
-            if dead_ends:
-                big_apple_positions = random.choices(dead_ends, k=max(1, len(dead_ends) // 4))
+            self.dead_ends = self.find_dead_ends()
+            if self.dead_ends:
+                big_apple_positions = rng.choices(self.dead_ends, k=max(1, len(self.dead_ends) // 4))
                 for x, y in big_apple_positions:
                     self.apple_map[x, y] = 2
 
@@ -150,203 +172,132 @@ class Map:
             if self._is_fully_connected():
                 break
         else:
+            if self.CONNECTED_GENERATION:
+                raise RuntimeError("connected map generation produced a disconnected map")
             # якщо всі спроби провалились — останній варіант залишаємо як є
             print("[Map] Warning: failed to build fully connected map after", MAX_TRIES, "tries")
 
-    def find_dead_ends(self):
-        dead_ends = []
-        for x in range(self.size):
-            for y in range(self.size):
-                if self.map[x, y] == 0:
-                    free_neighbours = self.get_free_neighbours(x, y)
-                    if len(free_neighbours) == 1:
-                        dead_ends.append((x, y))
+    def load_layout(self, layout: MapLayout):
+        """Взяти готову карту (напр. з корпусу) замість генерації."""
+        self.map = np.array(layout.walls, dtype=int)
+        self.apple_map = np.array(layout.apple_map, dtype=float)
+        self.adjacency = AdjacencyIndex(self.map)
+        self.flow_fields.clear()
+        self.dead_ends = [(int(x), int(y)) for x, y in layout.dead_ends]
+        if layout.distance is not None and layout.direction is not None:
+            self.next_hop_table = NextHopTable(self.map, layout.distance, layout.direction)
+
+    def get_layout(self, with_distances=False) -> MapLayout:
+        """Початковий стан карти (до гри) для запису в корпус."""
+        distance = direction = None
+        if with_distances:
+            table = self.next_hop_table if self.next_hop_table is not None else NextHopTable(self.map_copy)
+            distance, direction = table.distance, table.direction
+        return MapLayout(self.seed, self.map_copy.astype(np.uint8), self.apple_map_copy.astype(np.uint8),
+                         list(self.dead_ends), distance, direction)
 
-        return dead_ends
+    def find_dead_ends(self):
+        """Прохідні клітинки рівно з одним прохідним сусідом — згортка кількості сусідів, рядок за рядком."""
+        free = np.pad(self.map == 0, 1)
+        neighbours = (free[:-2, 1:-1].astype(np.int8) + free[2:, 1:-1] + free[1:-1, :-2] + free[1:-1, 2:])
+        dead_ends = np.argwhere(free[1:-1, 1:-1] & (neighbours == 1))
+        return [(int(x), int(y)) for x, y in dead_ends]
 
     def get_free_neighbours(self, x, y):
-        neighbours = []
-        if x > 0 and self.map[x-1, y] == 0:
-            neighbours.append((x-1, y))
-        if x < self.size - 1 and self.map[x+1, y] == 0:
-            neighbours.append((x+1, y))
-        if y > 0 and self.map[x, y-1] == 0:
-            neighbours.append((x, y-1))
-        if y < self.size - 1 and self.map[x, y+1] == 0:
-            neighbours.append((x, y+1))
-
-        for ghost_x, ghost_y in self.ghosts_positions:
-            if (ghost_x, ghost_y) in neighbours:
-                neighbours.remove((ghost_x, ghost_y))
-
-        if self.pacman_position in neighbours:
-            neighbours.remove(self.pacman_position)
-        
-        return neighbours
+        if self.occupancy is None:
+            return self.adjacency.neighbour_cells[x * self.size + y]
+        return self.occupancy.free_neighbours(x, y)
     
     def get_free_neighbours_for_ghost(self, x, y):
-        neighbours = []
-        if x > 0 and self.map[x-1, y] == 0:
-            neighbours.append((x-1, y))
-        if x < self.size - 1 and self.map[x+1, y] == 0:
-            neighbours.append((x+1, y))
-        if y > 0 and self.map[x, y-1] == 0:
-            neighbours.append((x, y-1))
-        if y < self.size - 1 and self.map[x, y+1] == 0:
-            neighbours.append((x, y+1))
-        
-        return neighbours
+        return self.adjacency.neighbour_cells[x * self.size + y]
     
-    def on_draw(self, tile_size):
-        self.wall_sprites_batch.draw()
-        self.small_apple_sprites_batch.draw()
-        self.big_apple_sprites_batch.draw()
-
     def get_bfs_apples(self, position):
-        depth = 5
-        queue = [position]
-        visited = np.zeros((self.size, self.size))
-        visited[position] = 1
+        """Яблука за <= 5 кроків вільними клітинками. Результат спільний для всіх викликів до наступної зміни — не змінювати."""
+        apples = self.bfs_apples_memo.get(position)
+        if apples is not None:
+            return apples
+
         apples = []
-        for i in range(depth):
-            new_queue = []
-            for current in queue:
-                for neighbour in self.get_free_neighbours(*current):
-                    if visited[neighbour] == 0:
-                        visited[neighbour] = 1
-                        new_queue.append(neighbour)
-                        if self.apple_map[neighbour] == 1:
-                            apples.append(neighbour)
-                        elif self.apple_map[neighbour] == 2:
-                            apples.append(neighbour)
-            queue = new_queue
-        
+        # по стінах поруч немає жодного яблука — привиди лише зменшують досяжне, BFS не потрібен
+        if self.apple_index.apples_within(position) > 0:
+            depth = 5
+            queue = [position]
+            visited = {position}
+            apple_map = self.apple_map
+            for i in range(depth):
+                new_queue = []
+                for current in queue:
+                    for neighbour in self.get_free_neighbours(*current):
+                        if neighbour not in visited:
+                            visited.add(neighbour)
+                            new_queue.append(neighbour)
+                            if apple_map[neighbour] != 0:
+                                apples.append(neighbour)
+                queue = new_queue
+
+        self.bfs_apples_memo[position] = apples
         return apples
 
-    def get_ghosts_nearby(self, position, radius):
-        ghosts = []
-        for ghost_position in self.ghosts_positions:
-            if abs(ghost_position[0] - position[0]) + abs(ghost_position[1] - position[1]) <= radius:
-                ghosts.append(ghost_position)
-        return ghosts
+    def get_best_apple(self, position, cost_function=None):
+        if cost_function is None:
+            cost_field = self.get_pacman_cost_field()
+            cost_function = lambda x: cost_field[x[0], x[1]]
 
-    def get_best_apple(self, position, cost_function):
         los_apples = self.get_bfs_apples(position)
         if len(los_apples) > 0:
             best_apple = tuple(min(los_apples, key=lambda x: abs(x[0] - position[0]) + abs(x[1] - position[1]) + cost_function(x) * 2))
             return best_apple
-        
-        apples = np.argwhere(self.apple_map == 1)
-        big_apples = np.argwhere(self.apple_map == 2)
-        merged_apples = np.concatenate((apples, big_apples), axis=0)
 
-        normalized_distance = lambda x: (abs(x[0] - position[0]) + abs(x[1] - position[1])) / self.size
+        # поруч яблук немає — йдемо до найближчого за лабіринтом (None, якщо жодне не досяжне)
+        return self.apple_index.nearest_apple(position)
 
-        return tuple(min(merged_apples, key=lambda x: (cost_function(x) * normalized_distance(x))))
+    def update_pacman_cost_field(self):
+        """Перерахувати вартості для всієї дошки — один раз за тік Pacman."""
+        self.pacman_cost_field = compute_pacman_cost_field(
+            self.map, self.apple_map, self.ghosts_positions, self.pacman_position)
+        return self.pacman_cost_field
 
+    def get_pacman_cost_field(self):
+        if self.pacman_cost_field is None:
+            self.update_pacman_cost_field()
+        return self.pacman_cost_field
 
     def get_pacman_cost(self, position):
-        cost = 0
-
-        # if wall then inf
-        if self.map[position[0], position[1]] == 1:
-            return 100000000
-
-        # how close is the position to ghosts
-        for ghost_position in self.ghosts_positions:
-            cost += 2 / (abs(ghost_position[0] - position[0]) + abs(ghost_position[1] - position[1]) + 1)
-
-        nearby_ghosts = self.get_ghosts_nearby(position, 2)
-        cost += 10 * len(nearby_ghosts)
-            
-
-        # how open is the position and ghost is near
-        is_dangerous_position = len(self.get_ghosts_nearby(position, 2)) > 0 
-        free_neighbours = self.get_free_neighbours(*position)
-        cost += 0.5 / (len(free_neighbours) + 1) if is_dangerous_position else 0
-        
-        apples = self.get_bfs_apples(position)
-
-        # how many apples
-        cost += 1 / (len(apples) + 1)
-
-        contains_apple = self.apple_map[position[0], position[1]]
-        # if position contains an apple
-        if contains_apple == 1:
-            cost /= 1.25
-        elif contains_apple == 2:
-            cost /= 1.5
-
-        
-
-        return cost
+        return float(self.get_pacman_cost_field()[position[0], position[1]])
 
     def is_apple_map_empty(self):
-        return sum(sum(self.apple_map)) == 0
+        return self.apple_index.is_empty()
     
     def is_position_near_or_inside_pacman(self, position):
         return abs(self.pacman_position[0] - position[0]) + abs(self.pacman_position[1] - position[1]) <= 1
 
     def bfs(self, start, finish, neighbours_function=None):
-        queue = [start]
-        visited = np.zeros((self.size, self.size))
-        visited[start] = 1
-        parent = np.zeros((self.size, self.size, 2))
-
-        while len(queue) > 0:
-            current = tuple(queue.pop(0))
-            if current == finish:
-                path = []
-                while current != start:
-                    path.append(current)
-                    current = tuple(parent[current[0], current[1]].astype(int))
-                path.append(start)
-                return path[::-1]
-
-            for neighbour in neighbours_function(*current):
-                if visited[neighbour] == 0:
-                    visited[neighbour] = 1
-                    parent[neighbour[0], neighbour[1]] = current
-                    queue.append(neighbour)
-
-        return []
+        """Найкоротший шлях від start до finish включно ([] — недосяжний) по neighbours_function."""
+        if neighbours_function is None:
+            neighbours_function = self.get_free_neighbours
+        # сусідство привидів — лише стіни, тож BFS може йти готовими індексами AdjacencyIndex
+        neighbour_indices = None
+        if neighbours_function == self.get_free_neighbours_for_ghost:
+            neighbour_indices = self.adjacency.neighbour_indices
+        return self.breadth_first_search.path(start, finish, neighbours_function, neighbour_indices)
+
+    def find_path(self, start, finish, cost_function=None):
+        """A* від start до finish крізь get_free_neighbours; повертає SearchResult."""
+        return self.path_search.search(start, finish, self.get_free_neighbours, cost_function)
+
+    def flow_field(self, target) -> FlowField:
+        """Поле відстаней до target, спільне для всіх привидів з цією ціллю; береться з LRU-кешу."""
+        field = self.flow_fields.get(target)
+        if field is None:
+            field = FlowField(self.adjacency, target)
+            self.flow_fields.put(target, field)
+        return field
+
+    def next_step_for_ghost(self, start, target):
+        """Наступна клітинка привида на шляху до target (None — стояти на місці)."""
+        if self.next_hop_table is not None:
+            return self.next_hop_table.next_step(start, target)
+        return self.flow_field(target).next_step(start)
 
     def dijkstra(self, start, finish, cost_function=None):
-        open_set = {start}
-        closed_set = set()
-        came_from = {}
-        g_score = {start: 0}
-
-        while open_set:
-            current = min(open_set, key=lambda x: g_score[x])
-
-            if current == finish:
-                path = []
-                while current != start:
-                    path.append(current)
-                    current = came_from[current]
-                path.append(start)
-                return path[::-1]
-
-            open_set.remove(current)
-            closed_set.add(current)
-
-            for neighbour in self.get_free_neighbours(*current):
-                if neighbour in closed_set:
-                    continue
-
-                if cost_function:
-                    tentative_g = g_score[current] + 1 + cost_function(neighbour)
-                else:
-                    tentative_g = g_score[current] + 1
-
-                if neighbour not in g_score or tentative_g < g_score[neighbour]:
-                    came_from[neighbour] = current
-                    g_score[neighbour] = tentative_g
-                    if neighbour not in open_set:
-                        open_set.add(neighbour)
-
-        print("No path found")
-        print(f"Start: {start}, Finish: {finish}")
-        print(f"Explored {len(closed_set)} nodes")
-        return []
\ No newline at end of file
+        return self.find_path(start, finish, cost_function).path
@@ -0,0 +1,184 @@
+import argparse
+import os
+import sys
+import time
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from Game.map import Map, MapLayout
+
+MAGIC = b"PACMAPS1"
+VERSION = 1
+FLAG_DISTANCES = 1
+# таблиці відстаней вирівнюються, щоб memmap-перегляди uint16 були вирівняні
+TABLE_ALIGNMENT = 64
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("version", "<u4"),
+    ("size", "<u4"),
+    ("count", "<u4"),
+    ("max_dead_ends", "<u4"),
+    ("flags", "<u4"),
+    ("reserved", "<u4", 3),
+])
+
+
+def record_dtype(size, max_dead_ends):
+    packed = (size * size + 7) // 8
+    return np.dtype([
+        ("seed", "<i8"),
+        ("walls", "u1", packed),
+        ("small_apples", "u1", packed),
+        ("big_apples", "u1", packed),
+        ("dead_end_count", "<u4"),
+        ("dead_ends", "<u2", (max_dead_ends, 2)),
+        ("cells_count", "<u4"),
+        ("table_offset", "<u8"),
+    ])
+
+
+def _pack(mask):
+    return np.packbits(mask.reshape(-1))
+
+
+def _unpack(packed, size):
+    return np.unpackbits(packed)[:size * size].reshape(size, size)
+
+
+def write_corpus(path, layouts: List[MapLayout]) -> None:
+    """
+    Один файл: заголовок, масив записів фіксованого розміру (біти стін і яблук, глухі кути)
+    і, якщо є, таблиці NextHopTable підряд за зсувами з записів. Усе читається через memmap.
+    """
+    if not layouts:
+        raise ValueError("corpus needs at least one map")
+    size = layouts[0].walls.shape[0]
+    if any(layout.walls.shape != (size, size) for layout in layouts):
+        raise ValueError("all maps in a corpus must have the same size")
+    max_dead_ends = max(max(len(layout.dead_ends) for layout in layouts), 1)
+    with_distances = all(layout.distance is not None for layout in layouts)
+
+    records = np.zeros(len(layouts), dtype=record_dtype(size, max_dead_ends))
+    header = np.zeros(1, dtype=HEADER_DTYPE)
+    header["magic"] = MAGIC
+    header["version"] = VERSION
+    header["size"] = size
+    header["count"] = len(layouts)
+    header["max_dead_ends"] = max_dead_ends
+    header["flags"] = FLAG_DISTANCES if with_distances else 0
+
+    offset = _align(HEADER_DTYPE.itemsize + records.nbytes)
+    for i, layout in enumerate(layouts):
+        records["seed"][i] = -1 if layout.seed is None else layout.seed
+        records["walls"][i] = _pack(layout.walls == 1)
+        records["small_apples"][i] = _pack(layout.apple_map == 1)
+        records["big_apples"][i] = _pack(layout.apple_map == 2)
+        records["dead_end_count"][i] = len(layout.dead_ends)
+        if layout.dead_ends:
+            records["dead_ends"][i, :len(layout.dead_ends)] = layout.dead_ends
+        cells_count = int((layout.walls == 0).sum())
+        records["cells_count"][i] = cells_count
+        if with_distances:
+            records["table_offset"][i] = offset
+            offset = _align(offset + 3 * cells_count * cells_count)
+
+    with open(path, "wb") as f:
+        f.write(header.tobytes())
+        f.write(records.tobytes())
+        if with_distances:
+            for offset, layout in zip(records["table_offset"], layouts):
+                f.seek(int(offset))
+                f.write(np.ascontiguousarray(layout.distance, dtype="<u2").tobytes())
+                f.write(np.ascontiguousarray(layout.direction, dtype=np.uint8).tobytes())
+
+
+def _align(offset):
+    return (offset + TABLE_ALIGNMENT - 1) // TABLE_ALIGNMENT * TABLE_ALIGNMENT
+
+
+class MapCorpus:
+    """
+    Корпус карт одного розміру, відкритий через memmap: відкриття нічого не читає,
+    а карта розпаковується лише тоді, коли її просять. Таблиці відстаней лишаються
+    memmap-переглядами — NextHopTable користується ними без копіювання.
+    """
+
+    def __init__(self, path) -> None:
+        self.path = path
+        self.data = np.memmap(path, dtype=np.uint8, mode="r")
+        header = self.data[:HEADER_DTYPE.itemsize].view(HEADER_DTYPE)[0]
+        if header["magic"] != MAGIC or header["version"] != VERSION:
+            raise ValueError(f"{path} is not a map corpus (version {VERSION})")
+        self.size = int(header["size"])
+        self.count = int(header["count"])
+        self.has_distances = bool(header["flags"] & FLAG_DISTANCES)
+
+        dtype = record_dtype(self.size, int(header["max_dead_ends"]))
+        start = HEADER_DTYPE.itemsize
+        self.records = self.data[start:start + dtype.itemsize * self.count].view(dtype)
+        self.seeds = self.records["seed"]
+
+    def __len__(self) -> int:
+        return self.count
+
+    def index_of_seed(self, seed) -> Optional[int]:
+        found = np.flatnonzero(self.seeds == seed)
+        return int(found[0]) if len(found) else None
+
+    def layout(self, i, with_distances=True) -> MapLayout:
+        record = self.records[i]
+        size = self.size
+        walls = _unpack(record["walls"], size)
+        apple_map = _unpack(record["small_apples"], size) + 2 * _unpack(record["big_apples"], size)
+        dead_ends = [tuple(int(v) for v in cell) for cell in record["dead_ends"][:int(record["dead_end_count"])]]
+
+        distance = direction = None
+        if with_distances and self.has_distances:
+            cells_count = int(record["cells_count"])
+            offset = int(record["table_offset"])
+            cells = cells_count * cells_count
+            distance = self.data[offset:offset + 2 * cells].view("<u2").reshape(cells_count, cells_count)
+            direction = self.data[offset + 2 * cells:offset + 3 * cells].reshape(cells_count, cells_count)
+
+        seed = int(record["seed"])
+        return MapLayout(None if seed < 0 else seed, walls, apple_map, dead_ends, distance, direction)
+
+    def load_map(self, i, with_distances=True) -> Map:
+        return Map(self.size, layout=self.layout(i, with_distances))
+
+    def load_seed(self, seed, with_distances=True) -> Map:
+        i = self.index_of_seed(seed)
+        if i is None:
+            raise KeyError(f"seed {seed} is not in {self.path}")
+        return self.load_map(i, with_distances)
+
+
+def build_corpus(path, size, seeds: Iterable[int], with_distances=False, log=None) -> None:
+    layouts = []
+    for seed in seeds:
+        layouts.append(Map(size, seed).get_layout(with_distances))
+        if log is not None and len(layouts) % 100 == 0:
+            log(f"{len(layouts)} maps")
+    write_corpus(path, layouts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Згенерувати корпус карт за seed-ами")
+    parser.add_argument("output")
+    parser.add_argument("--size", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0, help="seed першої карти; далі seed + i")
+    parser.add_argument("--maps", type=int, default=1000)
+    parser.add_argument("--distances", action="store_true", help="додати таблиці NextHopTable (V*V*3 байт на карту)")
+    args = parser.parse_args(argv)
+
+    log = lambda message: print(message, file=sys.stderr, flush=True)
+    started = time.perf_counter()
+    build_corpus(args.output, args.size, range(args.seed, args.seed + args.maps), args.distances, log)
+    log(f"{args.maps} maps -> {args.output} ({os.path.getsize(args.output) / 1024:.0f} KB) "
+        f"in {time.perf_counter() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
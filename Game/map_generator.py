@@ -2,10 +2,81 @@ import numpy as np
 import random
 
 
+def label_components(free):
+    """
+    Компоненти 4-зв'язності прохідних клітинок: горизонтальні відрізки рядків (scanline)
+    об'єднуються union-find за вертикальними дотиками. Повертає (labels, count);
+    labels = -1 для стін, компоненти пронумеровані в порядку першої клітинки (рядок за рядком).
+    """
+    starts = free.copy()
+    starts[:, 1:] &= ~free[:, :-1]
+    runs = np.cumsum(starts.ravel()).reshape(free.shape) - 1
+    run_count = int(starts.sum())
+    if run_count == 0:
+        return np.full(free.shape, -1), 0
+
+    touching = free[:-1] & free[1:]
+    upper = runs[:-1][touching].astype(np.int64)
+    lower = runs[1:][touching].astype(np.int64)
+    pairs = np.unique(upper * run_count + lower)
+
+    parent = list(range(run_count))
+
+    def find(run):
+        while parent[run] != run:
+            parent[run] = parent[parent[run]]
+            run = parent[run]
+        return run
+
+    for upper_run, lower_run in zip(*np.divmod(pairs, run_count)):
+        a, b = find(int(upper_run)), find(int(lower_run))
+        if a != b:
+            # менший корінь лишається коренем — нумерація йде за першою клітинкою
+            if a < b:
+                parent[b] = a
+            else:
+                parent[a] = b
+
+    component_of_run = np.empty(run_count, dtype=np.int64)
+    components = {}
+    for run in range(run_count):
+        root = find(run)
+        if root not in components:
+            components[root] = len(components)
+        component_of_run[run] = components[root]
+
+    labels = np.where(free, component_of_run[runs], -1)
+    return labels, len(components)
+
+
+def manhattan_distance_transform(sources):
+    """Відстань за Манхеттеном від кожної клітинки до найближчої клітинки sources (стіни не заважають)."""
+    n, m = sources.shape
+    infinity = n + m
+    xs = np.arange(n)[:, None]
+    ys = np.arange(m)[None, :]
+
+    # 1. уздовж стовпчика: до найближчого джерела вище і нижче
+    above = np.maximum.accumulate(np.where(sources, xs, -infinity), axis=0)
+    below = np.flip(np.minimum.accumulate(np.flip(np.where(sources, xs, 2 * infinity), axis=0), axis=0), axis=0)
+    column = np.minimum(xs - above, below - xs)
+
+    # 2. уздовж рядка: min по y' (column[y'] + |y - y'|) — два накопичувальні мінімуми
+    left = np.minimum.accumulate(column - ys, axis=1) + ys
+    right = np.flip(np.minimum.accumulate(np.flip(column + ys, axis=1), axis=1), axis=1) - ys
+    return np.minimum(left, right)
+
+
 class MapGenerator:
-    def __init__(self, map_size):
+    def __init__(self, map_size, seed=None, connected=True):
         self.map_size = map_size // 2
         self.original_map_size = map_size
+        # True — блоки з'єднуються L-коридорами, і лабіринт зв'язний за побудовою;
+        # False — старі прямі коридори, які інколи лишають блоки окремо (Map тоді перевіряє й повторює)
+        self.connected = connected
+        # власний генератор: той самий seed — той самий лабіринт, незалежно від глобального random
+        self.seed = seed
+        self.random = random.Random(seed)
         self.tetris_shapes = [
             np.array([[1, 1, 1, 1]]),
             np.array([[1, 1], [1, 1]]),
@@ -33,45 +104,47 @@ class MapGenerator:
         return map
 
     def join_separated_blocks(self, map):
-        visited = np.zeros(map.shape, dtype=bool)
-        blocks = []
-        for i in range(map.shape[0]):
-            for j in range(map.shape[1]):
-                if map[i, j] == 0 and not visited[i, j]:
-                    block = []
-                    self.bfs(map, visited, i, j, block)
-                    blocks.append(block)
-
-        if len(blocks) == 1:
+        labels, count = label_components(map == 0)
+        if count <= 1:
             return map
 
         # sort the blocks by center position
-        blocks.sort(key=lambda block: (sum(x for x, _ in block) / len(block),
-                                       sum(y for _, y in block) / len(block)))
-
-        # З’єднуємо блоки послідовно L-коридором
-        for i in range(1, len(blocks)):
-            block1 = blocks[i - 1]
-            block2 = blocks[i]
-
-            # знаходимо найближчу пару клітинок (за Манхеттеном)
-            min_dist = float('inf')
-            min_pair = None
-            for a in block1:
-                for b in block2:
-                    dist = abs(a[0] - b[0]) + abs(a[1] - b[1])
-                    if dist < min_dist:
-                        min_dist = dist
-                        min_pair = (a, b)
-
-            (x1, y1), (x2, y2) = min_pair
-
-            # L-path: спочатку по X, потім по Y (можна й навпаки)
-            # Всі клітинки шляху робимо прохідними (0)
-            for x in range(min(x1, x2), max(x1, x2) + 1):
-                map[x, y1] = 0
-            for y in range(min(y1, y2), max(y1, y2) + 1):
-                map[x2, y] = 0
+        xs, ys = np.indices(map.shape)
+        flat_labels = labels.ravel()
+        inside = flat_labels >= 0
+        sizes = np.bincount(flat_labels[inside], minlength=count)
+        centers_x = np.bincount(flat_labels[inside], weights=xs.ravel()[inside], minlength=count) / sizes
+        centers_y = np.bincount(flat_labels[inside], weights=ys.ravel()[inside], minlength=count) / sizes
+        order = sorted(range(count), key=lambda block: (centers_x[block], centers_y[block]))
+
+        # клітинки кожного блоку (плоскі індекси за зростанням)
+        cells_order = np.argsort(flat_labels, kind='stable')
+        bounds = np.searchsorted(flat_labels[cells_order], np.arange(count + 1))
+        blocks = [cells_order[bounds[label]:bounds[label + 1]] for label in range(count)]
+
+        width = map.shape[1]
+        for i in range(1, len(order)):
+            block1 = blocks[order[i - 1]]
+            block2 = blocks[order[i]]
+
+            # найближча пара за Манхеттеном: відстань від block1 до кожної клітинки — одним перетворенням,
+            # далі найближча клітинка block2 і найближча до неї клітинка block1
+            sources = np.zeros(map.size, dtype=bool)
+            sources[block1] = True
+            distance = manhattan_distance_transform(sources.reshape(map.shape)).ravel()
+            x2, y2 = divmod(int(block2[np.argmin(distance[block2])]), width)
+            block1_x, block1_y = np.divmod(block1, width)
+            nearest = np.argmin(np.abs(block1_x - x2) + np.abs(block1_y - y2))
+            x1, y1 = int(block1_x[nearest]), int(block1_y[nearest])
+
+            if self.connected:
+                # L-коридор: по X уздовж y1, потім по Y уздовж x2 — кінці завжди з'єднані
+                map[min(x1, x2):max(x1, x2) + 1, y1] = 0
+                map[x2, min(y1, y2):max(y1, y2) + 1] = 0
+            elif x1 == x2:
+                map[x1, min(y1, y2):max(y1, y2) + 1] = 0
+            else:
+                map[min(x1, x2):max(x1, x2) + 1, y1] = 0
 
         return map
 
@@ -85,121 +158,61 @@ class MapGenerator:
         map[:, 0] = 1
         map[:, -1] = 1
 
-    def bfs(self, map, visited, i, j, block):
-        queue = [(i, j)]
-        visited[i, j] = True
-        block.append((i, j))
-
-        while queue:
-            i, j = queue.pop(0)
-
-            if i > 0 and map[i - 1, j] == 0 and not visited[i - 1, j]:
-                queue.append((i - 1, j))
-                visited[i - 1, j] = True
-                block.append((i - 1, j))
-            if i < map.shape[0] - 1 and map[i + 1, j] == 0 and not visited[i + 1, j]:
-                queue.append((i + 1, j))
-                visited[i + 1, j] = True
-                block.append((i + 1, j))
-            if j > 0 and map[i, j - 1] == 0 and not visited[i, j - 1]:
-                queue.append((i, j - 1))
-                visited[i, j - 1] = True
-                block.append((i, j - 1))
-            if j < map.shape[1] - 1 and map[i, j + 1] == 0 and not visited[i, j + 1]:
-                queue.append((i, j + 1))
-                visited[i, j + 1] = True
-                block.append((i, j + 1))
-
-    def join_separated_blocks(self, map):
-        visited = np.zeros(map.shape, dtype=bool)
-        blocks = []
-        for i in range(map.shape[0]):
-            for j in range(map.shape[1]):
-                if map[i, j] == 0 and not visited[i, j]:
-                    block = []
-                    self.bfs(map, visited, i, j, block)
-                    blocks.append(block)
-
-        if len(blocks) == 1:
-            return map
-
-        # sort the blocks by center position
-        blocks.sort(
-            key=lambda block: (sum([x[0] for x in block]) / len(block), sum([x[1] for x in block]) / len(block)))
-
-        # join the blocks
-        for i in range(1, len(blocks)):
-            block1 = blocks[i - 1]
-            block2 = blocks[i]
-
-            min_dist = float('inf')
-            min_pair = None
-            for pair in [(a, b) for a in block1 for b in block2]:
-                dist = abs(pair[0][0] - pair[1][0]) + abs(pair[0][1] - pair[1][1])
-                if dist < min_dist:
-                    min_dist = dist
-                    min_pair = pair
-
-            x1, y1 = min_pair[0]
-            x2, y2 = min_pair[1]
-
-            if x1 == x2:
-                for y in range(min(y1, y2), max(y1, y2) + 1):
-                    map[x1, y] = 0
-            else:
-                for x in range(min(x1, x2), max(x1, x2) + 1):
-                    map[x, y1] = 0
-
-        return map
-
     def simulate_tetris(self):
+        """
+        Фігури падають згори у випадковий стовпчик і лягають на першу перешкоду; 10 невдач
+        поспіль — кінець. Кожен стовпчик чверті зберігається бітовою маскою зайнятих рядків,
+        тож точка приземлення — це O(ширина фігури) бітових операцій замість покрокового спуску.
+        """
+        size = self.map_size
+        columns = [0] * size
+        profiles = self.shape_profiles()
+
         max_failed_attempts = 10
         failed_attempts = 0
-        map_tile = np.zeros((self.map_size, self.map_size), dtype=int)
-
         while failed_attempts < max_failed_attempts:
-            tetris_shape = random.choice(self.tetris_shapes)
-            x = 0
-            y = random.randint(0, self.map_size - tetris_shape.shape[1])
-
-            placed = self.place_shape(map_tile, tetris_shape, x, y)
+            index = self.random.randrange(len(self.tetris_shapes))
+            # ті самі виклики, що й random.choice + randint, — той самий лабіринт для того самого стану
+            tetris_shape = self.tetris_shapes[index]
+            y = self.random.randint(0, size - tetris_shape.shape[1])
 
-            if placed:
+            if self.drop_shape(columns, profiles[index], tetris_shape.shape[0], y):
                 failed_attempts = 0
             else:
                 failed_attempts += 1
 
-        return map_tile
-
-    def place_shape(self, map_tile, shape, x, y):
-        while x + shape.shape[0] <= self.map_size:
-            # check if we can place the shape at the current position
-            if self.can_place_shape(map_tile, shape, x, y):
-                if x + shape.shape[0] == self.map_size or self.check_collision(map_tile, shape, x + 1, y):
-                    # place the shape if it's at the bottom or there's a collision below
-                    map_tile[x:x + shape.shape[0], y:y + shape.shape[1]] += shape
-                    return True
-                else:
-                    # move the shape down
-                    x += 1
-            else:
-                # if we can't place the shape at the initial position, return False
-                if x == 0:
-                    return False
-                # place the shape at the previous valid position
-                map_tile[x - 1:x - 1 + shape.shape[0], y:y + shape.shape[1]] += shape
-                return True
-        return False
-
-    def can_place_shape(self, map_tile, shape, x, y):
-        if x + shape.shape[0] > self.map_size or y + shape.shape[1] > self.map_size:
+        # біт x маски стовпчика y -> map_tile[x, y]
+        column_bytes = (size + 7) // 8
+        packed = np.frombuffer(b"".join(column.to_bytes(column_bytes, "little") for column in columns), dtype=np.uint8)
+        bits = np.unpackbits(packed.reshape(size, column_bytes), axis=1, bitorder="little")[:, :size]
+        return bits.T.astype(int)
+
+    def shape_profiles(self):
+        """Для кожної фігури: [(зсув стовпчика, верхній рядок, нижній рядок)] — клітинки в стовпчику суцільні."""
+        profiles = []
+        for shape in self.tetris_shapes:
+            profile = []
+            for dy in range(shape.shape[1]):
+                rows = np.flatnonzero(shape[:, dy])
+                profile.append((dy, int(rows[0]), int(rows[-1])))
+            profiles.append(profile)
+        return profiles
+
+    def drop_shape(self, columns, profile, height, y):
+        size = self.map_size
+        if height > size:
             return False
-        return np.all((map_tile[x:x + shape.shape[0], y:y + shape.shape[1]] + shape) <= 1)
-
-    def check_collision(self, map_tile, shape, x, y):
-        if x + shape.shape[0] > self.map_size:
-            return True
-        return np.any(map_tile[x:x + shape.shape[0], y:y + shape.shape[1]] * shape)
-
 
+        # найнижчий рядок x, на якому фігура ще ні з чим не перетинається, якщо падати згори
+        landing = size - height
+        for dy, top, bottom in profile:
+            below = columns[y + dy] >> top
+            if below:
+                first_taken = top + (below & -below).bit_length() - 1
+                landing = min(landing, first_taken - bottom - 1)
+        if landing < 0:
+            return False
 
+        for dy, top, bottom in profile:
+            columns[y + dy] |= ((1 << (bottom - top + 1)) - 1) << (landing + top)
+        return True
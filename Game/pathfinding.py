@@ -0,0 +1,391 @@
+import heapq
+from array import array
+from collections import OrderedDict, deque
+from typing import Callable, List, NamedTuple, Optional, Tuple
+import numpy as np
+
+RC = Tuple[int, int]
+
+# коди напрямків ті самі, що й Ghost.current_direction
+DIRS = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+# порядок, у якому Map.get_free_neighbours_for_ghost перелічує сусідів, і його коди в DIRS
+NEIGHBOUR_ORDER = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+NEIGHBOUR_DIRECTION = np.array([3, 1, 2, 0], dtype=np.uint8)
+
+NO_DIRECTION = 255
+UNREACHABLE = 65535
+# FlowField на картах, де шлях може бути довшим за 65534 кроки, зберігає uint32
+WIDE_UNREACHABLE = 2 ** 32 - 1
+
+
+class SearchResult(NamedTuple):
+    """Результат пошуку шляху; якщо ціль недосяжна — reachable=False і порожній path."""
+    path: List[RC]
+    reachable: bool
+    cost: float
+    explored: int
+
+
+class AStarSearch:
+    """
+    A* на бінарній купі з манхеттенською евристикою.
+    Кожне ребро коштує 1 + cost_function(сусід) >= 1, тож евристика допустима.
+    Застарілі записи в купі не видаляються, а пропускаються (lazy deletion).
+    Буфери g/parent переюзуються між викликами: замість очищення — номер покоління.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        cells = size * size
+        self.g_score: List[float] = [0.0] * cells
+        self.parent: List[int] = [-1] * cells
+        self.seen: List[int] = [0] * cells
+        self.closed: List[int] = [0] * cells
+        self.generation = 0
+
+    def search(self, start: RC, finish: RC, neighbours_function: Callable,
+               cost_function: Optional[Callable] = None) -> SearchResult:
+        size = self.size
+        g_score, parent, seen, closed = self.g_score, self.parent, self.seen, self.closed
+        self.generation += 1
+        generation = self.generation
+
+        start = (int(start[0]), int(start[1]))
+        finish = (int(finish[0]), int(finish[1]))
+        fx, fy = finish
+
+        start_index = start[0] * size + start[1]
+        g_score[start_index] = 0.0
+        parent[start_index] = -1
+        seen[start_index] = generation
+
+        heap = [(abs(start[0] - fx) + abs(start[1] - fy), 0.0, start_index, start)]
+        explored = 0
+
+        while heap:
+            _, g, index, current = heapq.heappop(heap)
+            if closed[index] == generation or g > g_score[index]:
+                continue
+            closed[index] = generation
+            explored += 1
+
+            if current == finish:
+                return SearchResult(self._build_path(index), True, g, explored)
+
+            for neighbour in neighbours_function(*current):
+                nx, ny = neighbour
+                neighbour_index = nx * size + ny
+                if closed[neighbour_index] == generation:
+                    continue
+
+                tentative_g = g + 1
+                if cost_function:
+                    tentative_g += cost_function(neighbour)
+
+                if seen[neighbour_index] != generation or tentative_g < g_score[neighbour_index]:
+                    seen[neighbour_index] = generation
+                    g_score[neighbour_index] = tentative_g
+                    parent[neighbour_index] = index
+                    h = abs(nx - fx) + abs(ny - fy)
+                    heapq.heappush(heap, (tentative_g + h, tentative_g, neighbour_index, (nx, ny)))
+
+        return SearchResult([], False, float('inf'), explored)
+
+    def _build_path(self, index: int) -> List[RC]:
+        path = []
+        while index != -1:
+            path.append(divmod(index, self.size))
+            index = self.parent[index]
+        return path[::-1]
+
+
+class BreadthFirstSearch:
+    """
+    BFS для Map.bfs без виділень на виклик: плоскі буфери int32 (visited, parent, черга)
+    створюються один раз на розмір карти. visited не очищується — клітинка відвідана, якщо
+    її позначка дорівнює номеру поточного пошуку. Кожна клітинка потрапляє в чергу не більше
+    разу, тож черзі фіксованої місткості size * size вистачає без переповнення.
+    Порядок обходу той самий, що був у Map.bfs, — і шляхи ті самі.
+    """
+
+    # позначки int32: після стількох пошуків буфер visited обнуляється
+    MAX_GENERATION = 2 ** 31 - 1
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        cells = size * size
+        self.visited = array("i", bytes(4 * cells))
+        self.parent = array("i", bytes(4 * cells))
+        self.queue = array("i", bytes(4 * cells))
+        self.generation = 0
+
+    def _search(self, start: RC, finish: RC, neighbours_function: Callable, neighbour_indices=None) -> int:
+        """
+        Індекс finish, якщо його досягнуто (parent заповнено), інакше -1.
+        neighbour_indices (AdjacencyIndex) — те саме сусідство, що й neighbours_function, але
+        готовими індексами: обхід тоді не створює жодного кортежу.
+        """
+        size, visited, parent, queue = self.size, self.visited, self.parent, self.queue
+        if self.generation == self.MAX_GENERATION:
+            visited[:] = array("i", bytes(4 * len(visited)))
+            self.generation = 0
+        self.generation += 1
+        generation = self.generation
+
+        start_index = int(start[0]) * size + int(start[1])
+        finish_index = int(finish[0]) * size + int(finish[1])
+        visited[start_index] = generation
+        queue[0] = start_index
+        head, tail = 0, 1
+        while head < tail:
+            current = queue[head]
+            head += 1
+            if current == finish_index:
+                return current
+            if neighbour_indices is not None:
+                for neighbour in neighbour_indices[current]:
+                    if visited[neighbour] != generation:
+                        visited[neighbour] = generation
+                        parent[neighbour] = current
+                        queue[tail] = neighbour
+                        tail += 1
+            else:
+                for nx, ny in neighbours_function(*divmod(current, size)):
+                    neighbour = nx * size + ny
+                    if visited[neighbour] != generation:
+                        visited[neighbour] = generation
+                        parent[neighbour] = current
+                        queue[tail] = neighbour
+                        tail += 1
+        return -1
+
+    def path(self, start: RC, finish: RC, neighbours_function: Callable, neighbour_indices=None) -> List[RC]:
+        """Шлях від start до finish включно або [], якщо finish недосяжний."""
+        index = self._search(start, finish, neighbours_function, neighbour_indices)
+        if index < 0:
+            return []
+        size, parent = self.size, self.parent
+        start_index = int(start[0]) * size + int(start[1])
+        path = []
+        while index != start_index:
+            path.append(divmod(index, size))
+            index = parent[index]
+        path.append(divmod(start_index, size))
+        return path[::-1]
+
+
+class NextHopTable:
+    """
+    Попередньо пораховані відстані й перший крок між усіма парами прохідних клітинок.
+    distance[i, j] (uint16) — кроків від клітинки i до j, direction[i, j] (uint8) — код DIRS
+    першого кроку. Перший крок збігається з path[1] з Map.bfs: BFS від кожного джерела
+    ведеться одночасно, а порядок черги відтворюється рангами всередині рівня.
+    Готові distance/direction (напр. з корпусу карт, хоч і memmap) беруться як є, без перебудови.
+    """
+
+    def __init__(self, walls, distance=None, direction=None) -> None:
+        self.shape = walls.shape
+        self.cells = np.argwhere(walls == 0)
+        cells_count = len(self.cells)
+        self.index = np.full(walls.shape, -1, dtype=np.int32)
+        self.index[self.cells[:, 0], self.cells[:, 1]] = np.arange(cells_count, dtype=np.int32)
+
+        # neighbours[k, i] — сусід клітинки i у напрямку NEIGHBOUR_ORDER[k] або -1
+        h, w = walls.shape
+        self.neighbours = np.full((4, cells_count), -1, dtype=np.int32)
+        for k, (dx, dy) in enumerate(NEIGHBOUR_ORDER):
+            xs, ys = self.cells[:, 0] + dx, self.cells[:, 1] + dy
+            inside = (xs >= 0) & (xs < h) & (ys >= 0) & (ys < w)
+            self.neighbours[k, inside] = self.index[xs[inside], ys[inside]]
+
+        if distance is not None and direction is not None:
+            self.distance = distance
+            self.direction = direction
+            return
+
+        self.distance = np.full((cells_count, cells_count), UNREACHABLE, dtype=np.uint16)
+        self.direction = np.full((cells_count, cells_count), NO_DIRECTION, dtype=np.uint8)
+        self._build(self.neighbours, cells_count)
+
+    def _build(self, neighbours, cells_count) -> None:
+        distance = self.distance.reshape(-1)
+        direction = self.direction.reshape(-1)
+
+        # фронт BFS: пари (джерело, клітинка) і ранг клітинки в черзі свого джерела
+        sources = np.arange(cells_count, dtype=np.int64)
+        frontier = sources.copy()
+        rank = np.zeros(cells_count, dtype=np.int64)
+        distance[sources * cells_count + sources] = 0
+
+        level = 0
+        while len(frontier) > 0:
+            level += 1
+            candidates = []
+            for k in range(4):
+                nxt = neighbours[k, frontier]
+                ok = nxt >= 0
+                flat = sources[ok] * cells_count + nxt[ok]
+                fresh = distance[flat] == UNREACHABLE
+                candidates.append((flat[fresh], sources[ok][fresh], frontier[ok][fresh],
+                                   rank[ok][fresh] * 4 + k, np.full(fresh.sum(), k)))
+            flat, new_sources, parents, keys, moves = (np.concatenate(c) for c in zip(*candidates))
+            if len(flat) == 0:
+                break
+
+            # батько — той, хто першим дістав клітинку з черги
+            order = np.argsort(flat * (4 * cells_count) + keys)
+            flat, new_sources, parents, keys, moves = flat[order], new_sources[order], parents[order], keys[order], moves[order]
+            first = np.ones(len(flat), dtype=bool)
+            first[1:] = flat[1:] != flat[:-1]
+            flat, new_sources, parents, keys, moves = flat[first], new_sources[first], parents[first], keys[first], moves[first]
+
+            distance[flat] = level
+            if level == 1:
+                direction[flat] = NEIGHBOUR_DIRECTION[moves]
+            else:
+                direction[flat] = direction[new_sources * cells_count + parents]
+
+            # новий ранг — позиція в черзі свого джерела
+            order = np.argsort(new_sources * (4 * cells_count) + keys)
+            sources = new_sources[order]
+            frontier = flat[order] - sources * cells_count
+            group_start = np.ones(len(sources), dtype=bool)
+            group_start[1:] = sources[1:] != sources[:-1]
+            positions = np.arange(len(sources))
+            rank = positions - np.maximum.accumulate(np.where(group_start, positions, 0))
+
+    @property
+    def nbytes(self) -> int:
+        return (self.distance.nbytes + self.direction.nbytes + self.index.nbytes + self.cells.nbytes
+                + self.neighbours.nbytes)
+
+    def memory_report(self) -> str:
+        return f"NextHopTable: {len(self.cells)} cells, {self.nbytes / (1024 * 1024):.2f} MB"
+
+    def get_distance(self, start: RC, target: RC) -> Optional[int]:
+        i, j = self.index[start[0], start[1]], self.index[target[0], target[1]]
+        if i < 0 or j < 0 or self.distance[i, j] == UNREACHABLE:
+            return None
+        return int(self.distance[i, j])
+
+    def next_step(self, start: RC, target: RC) -> Optional[RC]:
+        """Наступна клітинка на найкоротшому шляху або None, якщо йти нікуди."""
+        i, j = self.index[start[0], start[1]], self.index[target[0], target[1]]
+        if i < 0 or j < 0:
+            return None
+        code = self.direction[i, j]
+        if code == NO_DIRECTION:
+            return None
+        dx, dy = DIRS[code]
+        return (int(start[0]) + dx, int(start[1]) + dy)
+
+
+class FlowField:
+    """
+    Відстані від кожної клітинки до target по стінах — один зворотний BFS (граф неорієнтований).
+    Поле спільне для всіх привидів, що йдуть до тієї самої цілі: крок кожного — лише
+    перегляд до чотирьох сусідів, тож ціна кроку не залежить від кількості привидів.
+    """
+
+    def __init__(self, adjacency, target: RC) -> None:
+        self.size = adjacency.size
+        self.target = target
+        self.neighbour_indices = adjacency.neighbour_indices
+        cells = self.size * self.size
+        # найдовший шлях коротший за кількість прохідних клітинок — uint16 вистачає до 65535 клітинок
+        narrow = len(adjacency.open_cells) <= UNREACHABLE
+        self.unreachable = unreachable = UNREACHABLE if narrow else WIDE_UNREACHABLE
+        distance = [unreachable] * cells
+
+        tx, ty = int(target[0]), int(target[1])
+        if 0 <= tx < self.size and 0 <= ty < self.size:
+            # ціль у стіні не має сусідів — поле лишається порожнім, як і шлях Map.bfs
+            start = tx * self.size + ty
+            neighbour_indices = self.neighbour_indices
+            distance[start] = 0
+            queue = deque((start,))
+            while queue:
+                current = queue.popleft()
+                step = distance[current] + 1
+                for neighbour in neighbour_indices[current]:
+                    if distance[neighbour] == unreachable:
+                        distance[neighbour] = step
+                        queue.append(neighbour)
+
+        # BFS по списку швидший, а зберігаємо uint16 — 2 байти на клітинку, щоб у бюджет кешу влазило більше полів
+        self.distance = array("H" if narrow else "I", distance)
+
+    @property
+    def nbytes(self) -> int:
+        return self.distance.itemsize * len(self.distance)
+
+    def get_distance(self, start: RC) -> Optional[int]:
+        d = self.distance[start[0] * self.size + start[1]]
+        return None if d == self.unreachable else d
+
+    def next_step(self, start: RC) -> Optional[RC]:
+        """Сусід на крок ближчий до цілі (перший у порядку NEIGHBOUR_ORDER) або None."""
+        index = start[0] * self.size + start[1]
+        d = self.distance[index]
+        if d == 0 or d == self.unreachable:
+            return None
+        distance = self.distance
+        for neighbour in self.neighbour_indices[index]:
+            if distance[neighbour] == d - 1:
+                return divmod(neighbour, self.size)
+        return None
+
+
+class FlowFieldCache:
+    """
+    LRU полів FlowField за клітинкою-ціллю з бюджетом пам'яті в байтах. Стіни карти між
+    restore_map не змінюються, тож поле лишається правильним, доки його не витіснять.
+    Цілі привидів (клітинки Pacman, точки попереду нього, кути Clyde) повторюються — більшість
+    кроків стає влученням у кеш.
+    """
+
+    def __init__(self, memory_budget: int) -> None:
+        self.memory_budget = memory_budget
+        self.fields: "OrderedDict[RC, FlowField]" = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self.fields)
+
+    def get(self, target: RC) -> Optional[FlowField]:
+        field = self.fields.get(target)
+        if field is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.fields.move_to_end(target)
+        return field
+
+    def put(self, target: RC, field: FlowField) -> None:
+        old = self.fields.pop(target, None)
+        if old is not None:
+            self.nbytes -= old.nbytes
+        self.fields[target] = field
+        self.nbytes += field.nbytes
+        # останнє поле лишаємо завжди, навіть якщо воно одне більше за бюджет
+        while self.nbytes > self.memory_budget and len(self.fields) > 1:
+            _, evicted = self.fields.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self.fields.clear()
+        self.nbytes = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def memory_report(self) -> str:
+        return (f"FlowFieldCache: {len(self.fields)} fields, {self.nbytes / (1024 * 1024):.2f} of "
+                f"{self.memory_budget / (1024 * 1024):.2f} MB, hit rate {self.hit_rate:.1%} "
+                f"({self.hits} hits, {self.misses} misses, {self.evictions} evictions)")
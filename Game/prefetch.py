@@ -0,0 +1,55 @@
+import random
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional
+
+from Game.map import Map, MapLayout
+
+
+def build_layout(size, seed, with_distances) -> MapLayout:
+    """Виконується у процесі-працівнику: генерація (з усіма спробами) і, за бажанням, NextHopTable."""
+    return Map(size, seed).get_layout(with_distances)
+
+
+class MapPrefetcher:
+    """
+    Готує карту наступного рівня в окремому процесі, поки триває поточний.
+    take() не чекає: якщо карта ще не готова, повертає None (рівень іде на старому лабіринті),
+    інакше збирає Map з готового MapLayout і одразу замовляє наступну.
+    """
+
+    def __init__(self, size, seed=None, with_distances=None, executor=None) -> None:
+        self.size = size
+        # з seed послідовність лабіринтів за рівнями відтворювана
+        self.seeds = random.Random(seed) if seed is not None else None
+        if with_distances is None:
+            with_distances = size <= Map.NEXT_HOP_TABLE_MAX_SIZE
+        self.with_distances = with_distances
+
+        self.owns_executor = executor is None
+        self.executor = executor if executor is not None else ProcessPoolExecutor(max_workers=1)
+        self.pending: Optional[Future] = None
+        self.request()
+
+    def next_seed(self):
+        return self.seeds.getrandbits(63) if self.seeds is not None else None
+
+    def request(self) -> None:
+        self.pending = self.executor.submit(build_layout, self.size, self.next_seed(), self.with_distances)
+
+    def is_ready(self) -> bool:
+        return self.pending is not None and self.pending.done()
+
+    def take(self) -> Optional[Map]:
+        if not self.is_ready():
+            return None
+        layout = self.pending.result()
+        self.request()
+        # таблиця відстаней уже порахована працівником — тут лише дешеві індекси
+        return Map(self.size, layout=layout)
+
+    def close(self) -> None:
+        if self.pending is not None:
+            self.pending.cancel()
+            self.pending = None
+        if self.owns_executor:
+            self.executor.shutdown(wait=True, cancel_futures=True)
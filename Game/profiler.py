@@ -0,0 +1,147 @@
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from Game.map import MapListener
+
+
+class RingBuffer:
+    """Кільцевий буфер останніх capacity значень (секунд)."""
+    def __init__(self, capacity: int) -> None:
+        self.values = np.zeros(capacity)
+        self.capacity = capacity
+        self.index = 0
+        self.count = 0
+
+    def append(self, value: float) -> None:
+        self.values[self.index] = value
+        self.index = (self.index + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def recent(self) -> np.ndarray:
+        """Значення від найстарішого до найновішого."""
+        if self.count < self.capacity:
+            return self.values[:self.count]
+        return np.concatenate((self.values[self.index:], self.values[:self.index]))
+
+    def percentiles(self, qs=(50, 95, 99)) -> np.ndarray:
+        if self.count == 0:
+            return np.zeros(len(qs))
+        return np.percentile(self.values[:self.count], qs)
+
+
+class TickProfiler(MapListener):
+    """
+    Таймери фаз тіку: хід привида (за роллю й класом стану), план Pacman, перевірка яблук, рендер.
+    attach() підміняє методи конкретних об'єктів гри обгортками з таймером, detach() прибирає
+    їх — вимкнений профайлер не залишає в коді гри жодної перевірки.
+    Як слухач карти, після Game.replace_map переносить таймери карти на новий лабіринт.
+    """
+    def __init__(self, capacity: int = 300) -> None:
+        self.capacity = capacity
+        self.phases: Dict[str, RingBuffer] = {}
+        self.frame_times = RingBuffer(capacity)
+        self._patched: List[Tuple[object, str, object]] = []
+        # підміни на поточній карті — окремо, бо карта може змінитись посеред гри
+        self._map_patched: List[Tuple[object, str, object]] = []
+        self._last_frame = None
+        self.game = None
+
+    @property
+    def attached(self) -> bool:
+        return bool(self._patched or self._map_patched)
+
+    def record(self, phase: str, seconds: float) -> None:
+        buffer = self.phases.get(phase)
+        if buffer is None:
+            buffer = self.phases[phase] = RingBuffer(self.capacity)
+        buffer.append(seconds)
+
+    def _patch(self, obj, name: str, wrapper, patched=None) -> None:
+        # атрибут екземпляра, який уже хтось підмінив (напр. ReplayRecorder), повертаємо як був
+        (self._patched if patched is None else patched).append((obj, name, vars(obj).get(name)))
+        setattr(obj, name, wrapper)
+
+    def _timed(self, phase: str, function):
+        perf_counter = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            result = function(*args, **kwargs)
+            self.record(phase, perf_counter() - start)
+            return result
+        return timed
+
+    def _timed_ghost_move(self, ghost):
+        move = ghost.move
+        perf_counter = time.perf_counter
+
+        def timed_move(map):
+            # фаза — за станом до кроку: саме він визначає, що рахує привид
+            phase = f"ghost.{ghost.role}.{ghost.state.__class__.__name__}"
+            start = perf_counter()
+            move(map)
+            self.record(phase, perf_counter() - start)
+        return timed_move
+
+    def attach(self, game) -> None:
+        if self.attached:
+            self.detach()
+        self._patch(game, "tick", self._timed("tick", game.tick))
+        for ghost in game.ghosts:
+            self._patch(ghost, "move", self._timed_ghost_move(ghost))
+        self._patch(game.pacman, "move", self._timed("pacman.plan", game.pacman.move))
+        self._patch_map(game.map)
+        self.game = game
+        game.map.listeners.append(self)
+
+    def _patch_map(self, map) -> None:
+        patched = self._map_patched
+        self._patch(map, "update_pacman_cost_field", self._timed("pacman.cost_field", map.update_pacman_cost_field), patched)
+        self._patch(map, "is_apple_map_empty", self._timed("apple_check", map.is_apple_map_empty), patched)
+
+    @staticmethod
+    def _restore(patched) -> None:
+        # методи класу знову стають видимими, щойно зникає атрибут екземпляра
+        for obj, name, previous in reversed(patched):
+            if previous is None:
+                delattr(obj, name)
+            else:
+                setattr(obj, name, previous)
+        patched.clear()
+
+    def on_map_replaced(self, map):
+        self._restore(self._map_patched)
+        self._patch_map(map)
+
+    def attach_renderer(self, renderer) -> None:
+        on_draw = renderer.on_draw
+        perf_counter = time.perf_counter
+
+        def timed_on_draw():
+            start = perf_counter()
+            if self._last_frame is not None:
+                self.frame_times.append(start - self._last_frame)
+            self._last_frame = start
+            on_draw()
+            self.record("render", perf_counter() - start)
+        self._patch(renderer, "on_draw", timed_on_draw)
+
+    def detach(self) -> None:
+        self._restore(self._map_patched)
+        self._restore(self._patched)
+        self._last_frame = None
+        if self.game is not None and self in self.game.map.listeners:
+            self.game.map.listeners.remove(self)
+        self.game = None
+
+    def stats(self):
+        """[(фаза, p50, p95, p99, кількість вимірів)] у секундах, найдорожчі за p95 — першими."""
+        rows = []
+        for phase, buffer in self.phases.items():
+            p50, p95, p99 = buffer.percentiles()
+            rows.append((phase, p50, p95, p99, buffer.count))
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows
@@ -0,0 +1,402 @@
+import numpy as np
+import pyglet
+from pyglet import gl
+
+from Game.cost_field import WALL_COST, compute_pacman_cost_field
+from Game.map import MapListener
+from Game.profiler import TickProfiler
+
+FRAME_BUDGET = 1 / 60.0
+
+
+class MapImages:
+    def __init__(self, wall_image, small_apple_image, big_apple_image):
+        self.wall_image = wall_image
+        self.small_apple_image = small_apple_image
+        self.big_apple_image = big_apple_image
+
+
+class SpritePool:
+    """
+    Спрайти одного зображення в одному Batch, що переживають рестарти й заміну лабіринту:
+    place() пересуває й показує вже створені (створення спрайта в pyglet дороге), зайві ховає.
+    """
+    def __init__(self, image, batch, tile_size):
+        self.image = image
+        self.batch = batch
+        self.tile_size = tile_size
+        self.sprites = []
+
+    def place(self, cells):
+        tile_size = self.tile_size
+        while len(self.sprites) < len(cells):
+            sprite = pyglet.sprite.Sprite(img=self.image, batch=self.batch)
+            sprite.width, sprite.height = tile_size, tile_size
+            self.sprites.append(sprite)
+
+        for sprite, (x, y) in zip(self.sprites, cells):
+            sprite.position = (x * tile_size, y * tile_size, sprite.z)
+            if not sprite.visible:
+                sprite.visible = True
+        for sprite in self.sprites[len(cells):]:
+            if sprite.visible:
+                sprite.visible = False
+        return self.sprites[:len(cells)]
+
+
+class MapRenderer(MapListener):
+    """Спрайти стін і яблук. Слухає карту, щоб прибирати з'їдені яблука й перебудовуватись після restore."""
+    def __init__(self, map, map_images: MapImages, tile_size):
+        self.map = map
+        self.map_images = map_images
+        self.tile_size = tile_size
+
+        self.wall_sprites_batch = pyglet.graphics.Batch()
+        self.small_apple_sprites_batch = pyglet.graphics.Batch()
+        self.big_apple_sprites_batch = pyglet.graphics.Batch()
+        self.wall_sprites = SpritePool(map_images.wall_image, self.wall_sprites_batch, tile_size)
+        self.small_apple_sprites = SpritePool(map_images.small_apple_image, self.small_apple_sprites_batch, tile_size)
+        self.big_apple_sprites = SpritePool(map_images.big_apple_image, self.big_apple_sprites_batch, tile_size)
+
+        self.init_sprites(tile_size, map.size)
+        map.listeners.append(self)
+
+    def init_sprites(self, tile_size, size):
+        self.apple_sprites = [[None] * size for _ in range(size)]
+
+        self.wall_sprites.place([(int(x), int(y)) for x, y in np.argwhere(self.map.map == 1)])
+        for apple_type, pool in ((1, self.small_apple_sprites), (2, self.big_apple_sprites)):
+            cells = [(int(x), int(y)) for x, y in np.argwhere(self.map.apple_map == apple_type)]
+            for (x, y), sprite in zip(cells, pool.place(cells)):
+                self.apple_sprites[x][y] = sprite
+
+    def on_apple_eaten(self, x, y):
+        if self.apple_sprites[x][y]:
+            # спрайт лишається в пулі до наступного restore
+            self.apple_sprites[x][y].visible = False
+            self.apple_sprites[x][y] = None
+
+    def on_map_restored(self):
+        self.init_sprites(self.tile_size, self.map.size)
+
+    def on_map_replaced(self, map):
+        # спрайти перебудує on_map_restored, що йде слідом
+        self.map = map
+
+    def on_draw(self):
+        self.wall_sprites_batch.draw()
+        self.small_apple_sprites_batch.draw()
+        self.big_apple_sprites_batch.draw()
+
+
+class CostOverlay(MapListener):
+    """
+    Шар вартостей Pacman для налагодження: сітка міток у Batch або кольорова теплокарта-текстура.
+    Поле перераховується лише коли рушили привиди/Pacman або змінились яблука;
+    в текстовому режимі переписуються лише мітки, чиє округлене значення змінилось.
+    """
+    MODES = ("text", "heatmap")
+
+    def __init__(self, map, tile_size):
+        self.map = map
+        self.tile_size = tile_size
+        self.mode = "text"
+
+        self.apples_version = 0
+        self.key = None
+        self.cost_field = None
+
+        self.batch = None
+        self.labels = {}
+        self.heatmap = None
+        map.listeners.append(self)
+
+    def on_apple_eaten(self, x, y):
+        self.apples_version += 1
+
+    def on_map_restored(self):
+        self.apples_version += 1
+
+    def on_map_replaced(self, map):
+        # інші стіни — сітку міток треба будувати заново
+        self.map = map
+        self.batch = None
+        self.key = None
+
+    def next_mode(self):
+        self.mode = self.MODES[(self.MODES.index(self.mode) + 1) % len(self.MODES)]
+        # новий режим будує свій шар з нуля
+        self.key = None
+
+    def current_key(self):
+        return tuple(self.map.ghosts_positions), self.map.pacman_position, self.apples_version
+
+    def build_labels(self):
+        self.batch = pyglet.graphics.Batch()
+        self.labels = {}
+        tile_size = self.tile_size
+        for x, y in np.argwhere(self.map.map == 0):
+            x, y = int(x), int(y)
+            self.labels[(x, y)] = pyglet.text.Label("", font_name='Arial', font_size=8,
+                                                    x=x * tile_size, y=y * tile_size, batch=self.batch)
+
+    def update_labels(self):
+        if self.batch is None:
+            self.build_labels()
+        rounded = np.round(self.cost_field, 2)
+        for (x, y), label in self.labels.items():
+            text = f"{rounded[x, y]}"
+            if label.text != text:
+                label.text = text
+
+    def update_heatmap(self):
+        cost = self.cost_field
+        free = cost < WALL_COST
+        low, high = cost[free].min(), cost[free].max()
+        normalized = np.zeros(cost.shape)
+        if high > low:
+            normalized[free] = (cost[free] - low) / (high - low)
+
+        # дешеві клітинки — зелені, дорогі — червоні; стіни прозорі
+        rgba = np.zeros(cost.shape + (4,), dtype=np.uint8)
+        rgba[..., 0] = (255 * normalized).astype(np.uint8)
+        rgba[..., 1] = (255 * (1 - normalized)).astype(np.uint8)
+        rgba[..., 3] = np.where(free, 140, 0)
+        # ImageData іде рядками знизу вгору: рядок — це y, стовпчик — x
+        data = np.ascontiguousarray(rgba.transpose(1, 0, 2)).tobytes()
+        size_x, size_y = cost.shape
+        image = pyglet.image.ImageData(size_x, size_y, 'RGBA', data)
+
+        if self.heatmap is None:
+            self.heatmap = pyglet.sprite.Sprite(image)
+            self.heatmap.scale = self.tile_size
+        else:
+            self.heatmap.image = image
+        texture = self.heatmap.image.get_texture()
+        gl.glBindTexture(texture.target, texture.id)
+        gl.glTexParameteri(texture.target, gl.GL_TEXTURE_MAG_FILTER, gl.GL_NEAREST)
+        gl.glTexParameteri(texture.target, gl.GL_TEXTURE_MIN_FILTER, gl.GL_NEAREST)
+
+    def update(self):
+        key = self.current_key()
+        if key == self.key:
+            return
+        self.key = key
+        self.cost_field = compute_pacman_cost_field(
+            self.map.map, self.map.apple_map, self.map.ghosts_positions, self.map.pacman_position)
+        if self.mode == "text":
+            self.update_labels()
+        else:
+            self.update_heatmap()
+
+    def draw(self):
+        self.update()
+        if self.mode == "text":
+            self.batch.draw()
+        else:
+            self.heatmap.draw()
+
+
+class HudLabel:
+    """Постійна мітка в batch HUD; текст і позиція змінюються лише тоді, коли змінилось значення."""
+    def __init__(self, batch, font_size, x, y, anchor_x='left', anchor_y='top', font_name='Arial'):
+        self.value = None
+        self.label = pyglet.text.Label("", font_name=font_name, font_size=font_size,
+                                       x=x, y=y, anchor_x=anchor_x, anchor_y=anchor_y, batch=batch)
+
+    def set(self, value, text_function=str):
+        if value != self.value:
+            self.value = value
+            self.label.text = text_function(value)
+
+    def move_to(self, x, y):
+        if self.label.x != x or self.label.y != y:
+            self.label.position = (x, y, 0)
+
+    def delete(self):
+        self.label.delete()
+
+
+class GameHud:
+    """
+    Рахунок, життя, стани й номери привидів. Мітки живуть в одному Batch і перемальовуються
+    одним draw(); розкладку тексту pyglet перераховує лише для значень, що змінились.
+    """
+    def __init__(self, game, tile_size, clock=None):
+        self.game = game
+        self.tile_size = tile_size
+        self.clock = clock
+        self.batch = pyglet.graphics.Batch()
+
+        top = game.map.size * tile_size
+        right = game.map.size * tile_size
+        self.score = HudLabel(self.batch, 16, 0, top)
+        self.lives = HudLabel(self.batch, 16, right, top, anchor_x='right')
+        self.pacman_state = HudLabel(self.batch, 10, 0, top - 18)
+        self.difficulty = HudLabel(self.batch, 10, 0, top - 36)
+        self.target = HudLabel(self.batch, 10, 0, top - 54)
+        # SimulationClock: обраний множник і фактичні тіки за секунду
+        self.speed = HudLabel(self.batch, 10, right, 0, anchor_y='bottom', anchor_x='right') if clock else None
+
+        self.ghost_states = []
+        self.ghost_numbers = []
+
+    def sync_ghosts(self):
+        """Кількість привидів може змінитись між рівнями — додаємо/прибираємо лише різницю."""
+        ghosts = self.game.ghosts
+        top = right = self.game.map.size * self.tile_size
+        while len(self.ghost_states) < len(ghosts):
+            n = len(self.ghost_states)
+            self.ghost_states.append(HudLabel(self.batch, 10, right, top - 18 * (n + 1), anchor_x='right'))
+            self.ghost_numbers.append(HudLabel(self.batch, 12, 0, 0, anchor_x='left', anchor_y='baseline',
+                                               font_name='Times New Roman'))
+        while len(self.ghost_states) > len(ghosts):
+            self.ghost_states.pop().delete()
+            self.ghost_numbers.pop().delete()
+
+    def update(self):
+        game, tile_size = self.game, self.tile_size
+        self.sync_ghosts()
+
+        self.score.set(game.pacman.score, lambda v: f"Score: {v}")
+        self.lives.set(game.pacman.lives, lambda v: f"Lives: {v}")
+        self.pacman_state.set(game.pacman.state.__class__, lambda v: f"Pacman state: {v.__name__}")
+        self.difficulty.set(game.difficulty, lambda v: f"Difficulty: {v}")
+        self.target.set(game.points_target, lambda v: f"Target: {v}")
+        if self.speed is not None:
+            clock = self.clock
+            self.speed.set((clock.label, round(clock.ticks_per_second)), lambda v: f"Speed: {v[0]} ({v[1]} ticks/s)")
+
+        for ghost, state_label, number_label in zip(game.ghosts, self.ghost_states, self.ghost_numbers):
+            state_label.set((ghost.n, ghost.state.__class__), lambda v: f"Ghost {v[0]} state: {v[1].__name__}")
+            number_label.set(ghost.n)
+            number_label.move_to(ghost.x * tile_size, ghost.y * tile_size)
+
+    def draw(self):
+        self.update()
+        self.batch.draw()
+
+
+class ProfilerHud:
+    """
+    Таблиця p50/p95/p99 фаз TickProfiler і спарклайн часу кадру.
+    Мітки й стовпчики створюються один раз; на кадр змінюються лише їхні текст і висота.
+    """
+    MAX_ROWS = 12
+    SPARKLINE_HEIGHT = 40
+
+    def __init__(self, profiler: TickProfiler, x, y):
+        self.profiler = profiler
+        self.batch = pyglet.graphics.Batch()
+
+        self.background = pyglet.shapes.Rectangle(x, y, 300, self.SPARKLINE_HEIGHT + 14 * (self.MAX_ROWS + 1) + 8,
+                                                  color=(0, 0, 0, 180), batch=self.batch)
+        self.bars = []
+        for i in range(profiler.capacity):
+            bar = pyglet.shapes.Rectangle(x + 4 + i, y + 4, 1, 0, color=(0, 255, 0), batch=self.batch)
+            self.bars.append(bar)
+        # лінія бюджету кадру (16.7 мс) — половина висоти спарклайна
+        self.budget_line = pyglet.shapes.Line(x + 4, y + 4 + self.SPARKLINE_HEIGHT // 2,
+                                              x + 4 + profiler.capacity, y + 4 + self.SPARKLINE_HEIGHT // 2,
+                                              color=(255, 255, 0), batch=self.batch)
+
+        top = y + self.SPARKLINE_HEIGHT + 14 * (self.MAX_ROWS + 1)
+        self.labels = []
+        for i in range(self.MAX_ROWS + 1):
+            label = pyglet.text.Label("", font_name='Courier New', font_size=8,
+                                      x=x + 4, y=top - 14 * i, anchor_x='left', anchor_y='top', batch=self.batch)
+            self.labels.append(label)
+
+    def update(self):
+        frame_times = self.profiler.frame_times.recent()
+        scale = (self.SPARKLINE_HEIGHT / 2) / FRAME_BUDGET
+        offset = len(self.bars) - len(frame_times)
+        for i, bar in enumerate(self.bars):
+            if i < offset:
+                bar.height = 0
+                continue
+            frame_time = frame_times[i - offset]
+            bar.height = min(self.SPARKLINE_HEIGHT, frame_time * scale)
+            bar.color = (255, 64, 64) if frame_time > FRAME_BUDGET else (0, 255, 0)
+
+        texts = [f"{'phase':<34} {'p50':>6} {'p95':>6} {'p99':>6} ms"]
+        for phase, p50, p95, p99, _ in self.profiler.stats()[:self.MAX_ROWS]:
+            texts.append(f"{phase[:34]:<34} {p50 * 1000:6.2f} {p95 * 1000:6.2f} {p99 * 1000:6.2f}")
+        texts += [""] * (len(self.labels) - len(texts))
+        for label, text in zip(self.labels, texts):
+            if label.text != text:
+                label.text = text
+
+    def draw(self):
+        self.update()
+        self.batch.draw()
+
+
+class GameRenderer:
+    """
+    Необов'язковий pyglet-вигляд поверх Game. Симуляція про нього не знає:
+    рендерер лише читає стан гри в on_draw — скільки б тіків не пройшло між кадрами.
+    """
+    def __init__(self, game, map_images: MapImages, ghost_sprites, pacman_sprites, tile_size, clock=None):
+        self.game = game
+        self.tile_size = tile_size
+        self.map_renderer = MapRenderer(game.map, map_images, tile_size)
+        # ghost_sprites[i] — 4 спрайти (за напрямком) для привида i
+        self.ghost_sprites = ghost_sprites
+        self.pacman_sprites = pacman_sprites
+
+        self.show_pacman_costs = False
+        self.cost_overlay = CostOverlay(game.map, tile_size)
+        self.hud = GameHud(game, tile_size, clock)
+
+        self.profiler = None
+        self.profiler_hud = None
+
+    def toggle_profiler(self):
+        """Увімкнути/вимкнути таймери фаз і їхній HUD; вимкнені вони нічого не коштують."""
+        if self.profiler is None:
+            self.profiler = TickProfiler()
+            self.profiler.attach(self.game)
+            self.profiler.attach_renderer(self)
+            self.profiler_hud = ProfilerHud(self.profiler, 0, 0)
+        else:
+            self.profiler.detach()
+            self.profiler = None
+            self.profiler_hud = None
+
+    def draw_ghost(self, ghost, tile_size):
+        current_sprite = self.ghost_sprites[ghost.n][ghost.current_direction]
+        current_sprite.x = ghost.x * tile_size
+        current_sprite.y = ghost.y * tile_size
+        current_sprite.draw()
+
+    def draw_pacman(self, pacman, tile_size):
+        current_sprite = self.pacman_sprites[pacman.current_direction]
+
+        current_sprite.x = pacman.x * tile_size
+        current_sprite.y = pacman.y * tile_size
+        current_sprite.draw()
+
+    def on_draw(self):
+        game, tile_size = self.game, self.tile_size
+
+        self.map_renderer.on_draw()
+        for ghost in game.ghosts:
+            self.draw_ghost(ghost, tile_size)
+        self.draw_pacman(game.pacman, tile_size)
+
+        if self.show_pacman_costs:
+            self.cost_overlay.draw()
+            if game.pacman.path is not None:
+                for p in game.pacman.path:
+                    x, y = p
+                    pyglet.shapes.Circle(x * tile_size + tile_size // 2, y * tile_size + tile_size // 2, 5, color=(255, 0, 0)).draw()
+
+        if game.pacman.current_target is not None:
+            x, y = game.pacman.current_target
+            pyglet.shapes.Circle(x * tile_size + tile_size // 2, y * tile_size + tile_size // 2, 5, color=(0, 255, 0)).draw()
+
+        self.hud.draw()
+
+        if self.profiler_hud is not None:
+            self.profiler_hud.draw()
@@ -0,0 +1,478 @@
+import argparse
+import bisect
+import random
+import struct
+import sys
+import time
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from Agents.ghost import Ghost
+from Agents.pacman import Pacman
+from Game.game import Game
+from Game.map import Map, MapLayout, MapListener
+
+MAGIC = b"PACRPLY1"
+FOOTER_MAGIC = b"PACRPEND"
+VERSION = 1
+DEFAULT_KEYFRAME_INTERVAL = 600
+
+# коди станів привидів у лозі (класи з Agents/ghost.py)
+STATE_NAMES = ["GhostStateWandering", "GhostStateChaseDirect", "GhostStateAmbush", "GhostStateCutOff", "GhostStateShy"]
+STATE_CODES = {name: code for code, name in enumerate(STATE_NAMES)}
+UNKNOWN_STATE = 255
+
+# записи логу: 1 байт коду, далі payload
+TICK = b"T"          # кінець тіку: u8 n, n x (u8 сутність, u16 x, u16 y) — лише ті, хто рушив; 0 — Pacman
+APPLE = b"A"         # u16 x, u16 y — яблуко з'їдено
+STATE = b"S"         # u8 привид, u8 код стану
+VALUES = b"V"        # рахунок, життя, складність, смерті, банк, кінець гри — коли щось із них змінилось
+RESTORED = b"R"      # Map.restore_map: яблука поточної карти відновлено
+MAP = b"M"           # Game.replace_map: новий лабіринт (MapLayout)
+EXTERNAL_RESTART = b"X"  # restart_game поза тіком (клавіша R) — перед наступним тіком
+KEYFRAME = b"K"
+FOOTER = b"F"
+
+HEADER = struct.Struct("<8sHqHHHBiiqI")
+POSITION = struct.Struct("<BHH")
+XY = struct.Struct("<HH")
+GHOST_STATE = struct.Struct("<BB")
+VALUES_STRUCT = struct.Struct("<ihhIqB")
+KEYFRAME_HEAD = struct.Struct("<IQ")
+LAYOUT_HEAD = struct.Struct("<qHI")
+FOOTER_ENTRY = struct.Struct("<IQ")
+FOOTER_TAIL = struct.Struct("<Q8s")
+
+
+class ReplayDivergence(Exception):
+    """Повторна симуляція розійшлась із записом — отже, гра залежала від чогось поза логом."""
+
+
+class ReplayState(NamedTuple):
+    tick: int
+    pacman: Tuple[int, int]
+    ghosts: List[Tuple[int, int]]
+    ghost_states: List[str]
+    score: int
+    lives: int
+    difficulty: int
+    deaths: int
+    banked_score: int
+    is_over: bool
+    walls: np.ndarray
+    apple_map: np.ndarray
+
+
+def pack_layout(layout: MapLayout) -> bytes:
+    walls = np.asarray(layout.walls)
+    apple_map = np.asarray(layout.apple_map)
+    size = walls.shape[0]
+    dead_ends = np.asarray(layout.dead_ends, dtype="<u2").reshape(-1, 2)
+    return b"".join((
+        LAYOUT_HEAD.pack(-1 if layout.seed is None else layout.seed, size, len(dead_ends)),
+        np.packbits(walls.reshape(-1) == 1).tobytes(),
+        np.packbits(apple_map.reshape(-1) == 1).tobytes(),
+        np.packbits(apple_map.reshape(-1) == 2).tobytes(),
+        dead_ends.tobytes(),
+    ))
+
+
+def unpack_layout(data: bytes, offset: int) -> Tuple[MapLayout, int]:
+    seed, size, dead_end_count = LAYOUT_HEAD.unpack_from(data, offset)
+    offset += LAYOUT_HEAD.size
+    packed = (size * size + 7) // 8
+
+    def bits(start):
+        return np.unpackbits(np.frombuffer(data, np.uint8, packed, start))[:size * size].reshape(size, size)
+
+    walls = bits(offset)
+    apple_map = bits(offset + packed) + 2 * bits(offset + 2 * packed)
+    offset += 3 * packed
+    dead_ends = np.frombuffer(data, "<u2", 2 * dead_end_count, offset).reshape(-1, 2)
+    offset += 4 * dead_end_count
+    layout = MapLayout(None if seed < 0 else seed, walls, apple_map, [tuple(int(v) for v in cell) for cell in dead_ends])
+    return layout, offset
+
+
+def entity_positions(game) -> List[Tuple[int, int]]:
+    return [(game.pacman.x, game.pacman.y)] + [(ghost.x, ghost.y) for ghost in game.ghosts]
+
+
+def ghost_state_codes(game) -> List[int]:
+    return [STATE_CODES.get(ghost.state.__class__.__name__, UNKNOWN_STATE) for ghost in game.ghosts]
+
+
+def game_values(game) -> Tuple:
+    return (game.pacman.score, game.pacman.lives, game.difficulty, game.deaths, game.banked_score, int(game.is_over))
+
+
+class ReplayRecorder(MapListener):
+    """
+    Пише детермінований лог гри: seed для глобального random, стартовий лабіринт, а далі на кожен тік —
+    лише тих, хто рушив, зміни станів привидів, з'їдені яблука, зміни рахунку/життів/рівня й нові лабіринти.
+    Кожні keyframe_interval тіків — повний знімок для перемотування, в кінці — індекс знімків.
+
+    start() пересіює random і перезапускає гру, щоб запис почався зі стану, який плеєр відтворить.
+    Як і TickProfiler, підміняє game.tick і game.restart_game на рівні екземпляра.
+    """
+
+    def __init__(self, game: Game, path, keyframe_interval=DEFAULT_KEYFRAME_INTERVAL, seed=None) -> None:
+        self.game = game
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(63)
+
+        self.file = None
+        self.tick_count = 0
+        self.keyframes: List[Tuple[int, int]] = []
+        self.map_offset = 0
+        self.inside_tick = False
+        self._patched = []
+
+    # -------- запис --------
+    def start(self) -> None:
+        game = self.game
+        if len(game.ghosts) > 254:
+            raise ValueError("replay log supports at most 254 ghosts")
+        self.file = open(self.path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.seed, len(game.ghosts), game.pacman.max_lives,
+                                    game.difficulty, int(game.restart_on_game_over), game.points_target_base,
+                                    game.points_target_step, game.banked_score, self.keyframe_interval))
+        self.map_offset = self.file.tell()
+        self.file.write(pack_layout(self.current_layout()))
+
+        # далі гра залежить лише від seed і того, що записано в лозі
+        random.seed(self.seed)
+        game.restart_game()
+
+        game.map.listeners.append(self)
+        self._patch("tick", self.recorded_tick)
+        self._patch("restart_game", self.recorded_restart)
+
+        self.positions = entity_positions(game)
+        self.states = ghost_state_codes(game)
+        self.values = game_values(game)
+        self.write_keyframe()
+
+    def current_layout(self) -> MapLayout:
+        return self.game.map.get_layout()
+
+    def _patch(self, name, wrapper) -> None:
+        self._patched.append((name, vars(self.game).get(name), getattr(self.game, name)))
+        setattr(self.game, name, wrapper)
+
+    def original(self, name):
+        for patched_name, _, function in self._patched:
+            if patched_name == name:
+                return function
+        return getattr(self.game, name)
+
+    def recorded_restart(self) -> None:
+        if not self.inside_tick:
+            self.file.write(EXTERNAL_RESTART)
+        self.original("restart_game")()
+
+    def recorded_tick(self, dt=1 / 60.0) -> None:
+        game = self.game
+        if not game.is_updating:
+            return
+        self.inside_tick = True
+        try:
+            self.original("tick")(dt)
+        finally:
+            self.inside_tick = False
+        self.tick_count += 1
+        self.write_tick()
+        if self.tick_count % self.keyframe_interval == 0:
+            self.write_keyframe()
+
+    def write_tick(self) -> None:
+        game, write = self.game, self.file.write
+
+        states = ghost_state_codes(game)
+        for i, (old, new) in enumerate(zip(self.states, states)):
+            if old != new:
+                write(STATE + GHOST_STATE.pack(i, new))
+        self.states = states
+
+        values = game_values(game)
+        if values != self.values:
+            write(VALUES + VALUES_STRUCT.pack(*values))
+            self.values = values
+
+        positions = entity_positions(game)
+        moved = [(i, position) for i, (old, position) in enumerate(zip(self.positions, positions)) if old != position]
+        self.positions = positions
+        write(TICK + bytes((len(moved),)) + b"".join(POSITION.pack(i, x, y) for i, (x, y) in moved))
+
+    def write_keyframe(self) -> None:
+        game = self.game
+        self.keyframes.append((self.tick_count, self.file.tell()))
+        apple_map = game.map.apple_map.reshape(-1)
+        self.file.write(b"".join((
+            KEYFRAME,
+            KEYFRAME_HEAD.pack(self.tick_count, self.map_offset),
+            b"".join(XY.pack(x, y) for x, y in self.positions),
+            bytes(self.states),
+            VALUES_STRUCT.pack(*self.values),
+            np.packbits(apple_map == 1).tobytes(),
+            np.packbits(apple_map == 2).tobytes(),
+        )))
+
+    # -------- MapListener --------
+    def on_apple_eaten(self, x, y):
+        self.file.write(APPLE + XY.pack(x, y))
+
+    def on_map_restored(self):
+        self.file.write(RESTORED)
+
+    def on_map_replaced(self, map):
+        self.file.write(MAP)
+        self.map_offset = self.file.tell()
+        self.file.write(pack_layout(map.get_layout()))
+
+    def close(self) -> None:
+        if self.file is None:
+            return
+        for name, previous, _ in reversed(self._patched):
+            if previous is None:
+                delattr(self.game, name)
+            else:
+                setattr(self.game, name, previous)
+        self._patched = []
+        if self in self.game.map.listeners:
+            self.game.map.listeners.remove(self)
+
+        footer_offset = self.file.tell()
+        self.file.write(FOOTER + struct.pack("<I", len(self.keyframes)))
+        self.file.write(b"".join(FOOTER_ENTRY.pack(tick, offset) for tick, offset in self.keyframes))
+        self.file.write(FOOTER_TAIL.pack(footer_offset, FOOTER_MAGIC))
+        self.file.close()
+        self.file = None
+
+
+class ReplayPlayer:
+    """
+    Читає лог ReplayRecorder. state_at(tick) перемотує від найближчого знімка (не більше
+    keyframe_interval тіків розбору), resimulate() програє гру заново й звіряє кожен тік із записом.
+    """
+
+    def __init__(self, path) -> None:
+        with open(path, "rb") as f:
+            self.data = f.read()
+        (magic, version, self.seed, self.number_of_ghosts, self.max_lives, self.difficulty,
+         restart_on_game_over, self.points_target_base, self.points_target_step, self.banked_score,
+         self.keyframe_interval) = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a replay log (version {VERSION})")
+        self.restart_on_game_over = bool(restart_on_game_over)
+        self.layout, self.records_offset = unpack_layout(self.data, HEADER.size)
+
+        self.keyframe_ticks, self.keyframe_offsets = self._read_footer()
+        if not self.keyframe_ticks:
+            raise ValueError(f"{path} has no keyframes")
+        end = self.footer_offset if self.footer_offset is not None else len(self.data)
+        self.ticks = self.keyframe_ticks[-1] + self._count_ticks(self.keyframe_offsets[-1], end)
+
+    def _read_footer(self):
+        data = self.data
+        self.footer_offset = None
+        if len(data) >= FOOTER_TAIL.size:
+            footer_offset, magic = FOOTER_TAIL.unpack_from(data, len(data) - FOOTER_TAIL.size)
+            if magic == FOOTER_MAGIC:
+                self.footer_offset = footer_offset
+                count, = struct.unpack_from("<I", data, footer_offset + 1)
+                entries = [FOOTER_ENTRY.unpack_from(data, footer_offset + 5 + i * FOOTER_ENTRY.size) for i in range(count)]
+                return [tick for tick, _ in entries], [offset for _, offset in entries]
+
+        # запис обірвався (немає індексу) — знімки знаходимо одним проходом
+        ticks, offsets = [], []
+        for kind, offset, _ in self._records(self.records_offset, len(data)):
+            if kind == KEYFRAME:
+                ticks.append(KEYFRAME_HEAD.unpack_from(data, offset + 1)[0])
+                offsets.append(offset)
+        return ticks, offsets
+
+    def _count_ticks(self, start, end) -> int:
+        return sum(1 for kind, _, _ in self._records(start, end) if kind == TICK)
+
+    def _records(self, offset, end):
+        """(код, зсув запису, зсув payload) до end або до обриву файлу."""
+        data = self.data
+        entities = 1 + self.number_of_ghosts
+        packed = (self.layout.walls.size + 7) // 8
+        while offset < end:
+            kind = data[offset:offset + 1]
+            body = offset + 1
+            if kind == TICK:
+                if body >= len(data):
+                    return
+                size = 1 + data[body] * POSITION.size
+            elif kind == APPLE:
+                size = XY.size
+            elif kind == STATE:
+                size = GHOST_STATE.size
+            elif kind == VALUES:
+                size = VALUES_STRUCT.size
+            elif kind in (RESTORED, EXTERNAL_RESTART):
+                size = 0
+            elif kind == MAP:
+                # нові лабіринти того самого розміру, тож розмір знімка не змінюється
+                size = unpack_layout(data, body)[1] - body
+            elif kind == KEYFRAME:
+                size = KEYFRAME_HEAD.size + entities * XY.size + self.number_of_ghosts + VALUES_STRUCT.size + 2 * packed
+            else:
+                return
+            if body + size > len(data):
+                return
+            yield kind, offset, body
+            offset = body + size
+
+    def _layout_at(self, map_offset) -> MapLayout:
+        if map_offset == HEADER.size:
+            return self.layout
+        return unpack_layout(self.data, map_offset)[0]
+
+    def state_at(self, tick) -> ReplayState:
+        """Стан після тіку tick (0 — старт запису)."""
+        tick = max(0, min(tick, self.ticks))
+        data = self.data
+        k = bisect.bisect_right(self.keyframe_ticks, tick) - 1
+        offset = self.keyframe_offsets[k]
+        current, map_offset = KEYFRAME_HEAD.unpack_from(data, offset + 1)
+        layout = self._layout_at(map_offset)
+        size = layout.walls.shape[0]
+
+        body = offset + 1 + KEYFRAME_HEAD.size
+        entities = 1 + self.number_of_ghosts
+        positions = [XY.unpack_from(data, body + i * XY.size) for i in range(entities)]
+        body += entities * XY.size
+        states = list(data[body:body + self.number_of_ghosts])
+        body += self.number_of_ghosts
+        values = VALUES_STRUCT.unpack_from(data, body)
+        body += VALUES_STRUCT.size
+        packed = (size * size + 7) // 8
+        small = np.unpackbits(np.frombuffer(data, np.uint8, packed, body))[:size * size]
+        big = np.unpackbits(np.frombuffer(data, np.uint8, packed, body + packed))[:size * size]
+        apple_map = (small + 2 * big).reshape(size, size)
+        body += 2 * packed
+
+        for kind, record, payload in self._records(body, len(data)):
+            if current >= tick:
+                break
+            if kind == TICK:
+                for i in range(data[payload]):
+                    entity, x, y = POSITION.unpack_from(data, payload + 1 + i * POSITION.size)
+                    positions[entity] = (x, y)
+                current += 1
+            elif kind == APPLE:
+                x, y = XY.unpack_from(data, payload)
+                apple_map[x, y] = 0
+            elif kind == STATE:
+                ghost, code = GHOST_STATE.unpack_from(data, payload)
+                states[ghost] = code
+            elif kind == VALUES:
+                values = VALUES_STRUCT.unpack_from(data, payload)
+            elif kind == MAP:
+                layout = unpack_layout(data, payload)[0]
+            elif kind == RESTORED:
+                apple_map = np.array(layout.apple_map)
+
+        score, lives, difficulty, deaths, banked_score, is_over = values
+        return ReplayState(current, positions[0], positions[1:],
+                           [STATE_NAMES[code] if code < len(STATE_NAMES) else "?" for code in states],
+                           score, lives, difficulty, deaths, banked_score, bool(is_over),
+                           np.asarray(layout.walls), apple_map)
+
+    def build_game(self) -> Game:
+        """Гра в тому самому стані, в якому ReplayRecorder.start() почав запис."""
+        game_map = Map(self.layout.walls.shape[0], layout=self.layout)
+        game = Game(game_map, [Ghost(i) for i in range(self.number_of_ghosts)], Pacman(self.max_lives))
+        game.difficulty = self.difficulty
+        game.restart_on_game_over = self.restart_on_game_over
+        game.points_target_base = self.points_target_base
+        game.points_target_step = self.points_target_step
+        game.banked_score = self.banked_score
+
+        random.seed(self.seed)
+        game.restart_game()
+        return game
+
+    def resimulate(self, until=None, verify=True) -> Game:
+        """Зіграти гру заново до тіку until, за потреби звіряючи позиції з логом; повертає живий Game."""
+        until = self.ticks if until is None else min(until, self.ticks)
+        data = self.data
+        game = self.build_game()
+        replay_maps = ReplayMapSource(self)
+        game.map_prefetcher = replay_maps
+        positions = entity_positions(game)
+
+        tick = 0
+        for kind, _, payload in self._records(self.records_offset, len(data)):
+            if tick >= until:
+                break
+            if kind == MAP:
+                replay_maps.layouts.append(unpack_layout(data, payload)[0])
+            elif kind == EXTERNAL_RESTART:
+                game.restart_game()
+            elif kind == TICK:
+                game.tick()
+                tick += 1
+                if verify:
+                    for i in range(data[payload]):
+                        entity, x, y = POSITION.unpack_from(data, payload + 1 + i * POSITION.size)
+                        positions[entity] = (x, y)
+                    if entity_positions(game) != positions:
+                        raise ReplayDivergence(f"replay diverged at tick {tick}")
+        return game
+
+
+class ReplayMapSource:
+    """Замість MapPrefetcher під час повтору: віддає лабіринти в тому порядку, в якому їх записано."""
+
+    def __init__(self, player: ReplayPlayer) -> None:
+        self.player = player
+        self.layouts: List[MapLayout] = []
+
+    def take(self) -> Optional[Map]:
+        # 'M' пишеться в тому ж тіку, що й перехід рівня, і читається раніше за його 'T'
+        if not self.layouts:
+            return None
+        layout = self.layouts.pop(0)
+        return Map(layout.walls.shape[0], layout=layout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Перегляд і перевірка логів ReplayRecorder")
+    parser.add_argument("replay")
+    parser.add_argument("--tick", type=int, help="показати стан після цього тіку")
+    parser.add_argument("--verify", action="store_true", help="переграти весь лог і звірити кожен тік")
+    args = parser.parse_args(argv)
+
+    player = ReplayPlayer(args.replay)
+    print(f"seed {player.seed}, {player.ticks} ticks, {player.number_of_ghosts} ghosts, "
+          f"{len(player.keyframe_ticks)} keyframes")
+
+    if args.tick is not None:
+        started = time.perf_counter()
+        state = player.state_at(args.tick)
+        print(f"tick {state.tick} ({(time.perf_counter() - started) * 1000:.1f} ms): score {state.score}, "
+              f"lives {state.lives}, difficulty {state.difficulty}, pacman {state.pacman}")
+        for i, (position, state_name) in enumerate(zip(state.ghosts, state.ghost_states)):
+            print(f"  ghost {i}: {position} {state_name}")
+
+    if args.verify:
+        started = time.perf_counter()
+        try:
+            player.resimulate()
+        except ReplayDivergence as error:
+            print(error)
+            return 1
+        seconds = time.perf_counter() - started
+        print(f"replay matches: {player.ticks} ticks in {seconds:.2f} s ({player.ticks / max(seconds, 1e-9):.0f} ticks/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,320 @@
+import argparse
+import asyncio
+import struct
+import sys
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from Game.game import Game, create_game
+from Game.map import MapListener
+from Game.replay import POSITION, VALUES_STRUCT, XY, entity_positions, game_values, pack_layout, unpack_layout
+
+# кадр: u32 довжина (разом із кодом), код, payload
+FRAME_HEAD = struct.Struct("<IB")
+LAYOUT = ord("L")    # pack_layout — стартовий лабіринт або новий рівень
+DELTA = ord("D")     # DELTA_HEAD, u8 n x POSITION (хто рушив), u16 n x XY (з'їдені яблука), [VALUES_STRUCT]
+DELTA_HEAD = struct.Struct("<IIB")  # тік, скільки тіків пропущено для цього клієнта, прапорці
+RESET_APPLES = 1     # спершу повернути яблука з останнього LAYOUT (restore_map або новий клієнт)
+HAS_VALUES = 2       # рахунок, життя, складність, смерті, банк, кінець гри змінились
+
+DEFAULT_PORT = 8765
+# більше тіків за одне пробудження не доганяємо — перевантажена гра сповільнюється, а не блокує сусідів
+MAX_TICKS_PER_WAKE = 10
+# невеликий буфер сокета: повільний клієнт швидше отримує «лише останній кадр», а не чергу старих
+WRITE_BUFFER_HIGH = 16 * 1024
+
+
+def frame(kind: int, payload: bytes) -> bytes:
+    return FRAME_HEAD.pack(len(payload) + 1, kind) + payload
+
+
+class ClientBase(NamedTuple):
+    """Що клієнт уже отримав — від цього стану рахується наступна дельта."""
+    tick: int
+    layout_version: int
+    epoch: int
+    eaten_count: int
+    positions: List[Tuple[int, int]]
+    values: Tuple
+
+
+class GameSession(MapListener):
+    """
+    Одна безголова гра на спільному event loop: власний темп тіків і журнал з'їдених яблук
+    з моменту останнього restore_map — з нього будується дельта для будь-якого клієнта,
+    хоч би скільки кадрів він пропустив.
+    """
+
+    def __init__(self, game_id: int, game: Game, ticks_per_second=60) -> None:
+        self.game_id = game_id
+        self.game = game
+        self.ticks_per_second = ticks_per_second
+        self.tick = 0
+        self.subscribers: List["Subscriber"] = []
+
+        self.layout_version = 0
+        self.layout_bytes = pack_layout(game.map.get_layout())
+        # epoch зростає з кожним restore_map/replace_map; eaten — яблука, з'їдені в цій епосі
+        self.epoch = 0
+        self.eaten: List[Tuple[int, int]] = []
+        game.map.listeners.append(self)
+
+    # -------- MapListener --------
+    def on_apple_eaten(self, x, y):
+        self.eaten.append((x, y))
+
+    def on_map_restored(self):
+        self.epoch += 1
+        self.eaten = []
+
+    def on_map_replaced(self, map):
+        self.layout_version += 1
+        self.layout_bytes = pack_layout(map.get_layout())
+        self.on_map_restored()
+
+    # -------- симуляція --------
+    async def run(self) -> None:
+        """Тікає гру в своєму темпі; після кожного пробудження будить підписників (не чекаючи їх)."""
+        loop = asyncio.get_running_loop()
+        started, done = loop.time(), 0
+        while True:
+            due = int((loop.time() - started) * self.ticks_per_second) - done
+            if due > MAX_TICKS_PER_WAKE:
+                # відстали (завантажений loop) — пропущене не доганяємо
+                started += (due - MAX_TICKS_PER_WAKE) / self.ticks_per_second
+                due = MAX_TICKS_PER_WAKE
+            for _ in range(due):
+                self.game.tick()
+                self.tick += 1
+            done += due
+            if due:
+                for subscriber in self.subscribers:
+                    subscriber.notify()
+            await asyncio.sleep(max(started + (done + 1) / self.ticks_per_second - loop.time(), 0))
+
+    def encode(self, base: Optional[ClientBase]) -> Tuple[bytes, ClientBase]:
+        """Кадри від base (None — клієнт нічого не має) до поточного стану і новий base клієнта."""
+        game = self.game
+        parts = []
+        if base is None or base.layout_version != self.layout_version:
+            parts.append(frame(LAYOUT, self.layout_bytes))
+            base = None
+
+        flags = 0
+        if base is None or base.epoch != self.epoch:
+            flags |= RESET_APPLES
+            apples = self.eaten
+        else:
+            apples = self.eaten[base.eaten_count:]
+
+        positions = entity_positions(game)
+        if base is None:
+            moved = list(enumerate(positions))
+        else:
+            moved = [(i, position) for i, (old, position) in enumerate(zip(base.positions, positions)) if old != position]
+
+        values = game_values(game)
+        if base is None or values != base.values:
+            flags |= HAS_VALUES
+        skipped = 0 if base is None else max(self.tick - base.tick - 1, 0)
+
+        payload = [
+            DELTA_HEAD.pack(self.tick, skipped, flags),
+            bytes((len(moved),)),
+            b"".join(POSITION.pack(i, x, y) for i, (x, y) in moved),
+            struct.pack("<H", len(apples)),
+            b"".join(XY.pack(x, y) for x, y in apples),
+        ]
+        if flags & HAS_VALUES:
+            payload.append(VALUES_STRUCT.pack(*values))
+        parts.append(frame(DELTA, b"".join(payload)))
+        return b"".join(parts), ClientBase(self.tick, self.layout_version, self.epoch, len(self.eaten), positions, values)
+
+
+class Subscriber:
+    """
+    Клієнт однієї гри. Кадр збирається в момент відправки — від того, що клієнт уже має,
+    до найсвіжішого стану; поки drain() чекає повільного клієнта, проміжні тіки просто
+    зливаються в одну дельту, а симуляція не чекає нікого.
+    """
+
+    def __init__(self, session: GameSession, writer: asyncio.StreamWriter) -> None:
+        self.session = session
+        self.writer = writer
+        self.base: Optional[ClientBase] = None
+        self.pending = asyncio.Event()
+        self.frames_sent = 0
+        self.ticks_dropped = 0
+
+    def notify(self) -> None:
+        self.pending.set()
+
+    async def run(self) -> None:
+        self.pending.set()
+        while True:
+            await self.pending.wait()
+            self.pending.clear()
+            previous_tick = self.base.tick if self.base is not None else None
+            data, self.base = self.session.encode(self.base)
+            if previous_tick is not None:
+                self.ticks_dropped += max(self.base.tick - previous_tick - 1, 0)
+            self.writer.write(data)
+            self.frames_sent += 1
+            await self.writer.drain()
+
+
+class GameServer:
+    """
+    Багато ігор Pacman на одному asyncio loop і локальний TCP для глядачів.
+    Клієнт надсилає рядок з id гри й далі отримує кадри LAYOUT/DELTA (див. SnapshotDecoder).
+    """
+
+    def __init__(self, games: Dict[int, Game], ticks_per_second=60) -> None:
+        self.sessions = {game_id: GameSession(game_id, game, ticks_per_second) for game_id, game in games.items()}
+        self.tasks: List[asyncio.Task] = []
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        writer.transport.set_write_buffer_limits(high=WRITE_BUFFER_HIGH)
+        subscriber = None
+        try:
+            line = await reader.readline()
+            try:
+                session = self.sessions[int(line.strip() or 0)]
+            except (ValueError, KeyError):
+                writer.write(b"unknown game\n")
+                return
+            subscriber = Subscriber(session, writer)
+            session.subscribers.append(subscriber)
+            await subscriber.run()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if subscriber is not None:
+                subscriber.session.subscribers.remove(subscriber)
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=DEFAULT_PORT) -> None:
+        self.tasks = [asyncio.create_task(session.run()) for session in self.sessions.values()]
+        server = await asyncio.start_server(self.handle_client, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+class SnapshotDecoder:
+    """Стан гри на боці глядача: застосовує кадри сервера по черзі."""
+
+    def __init__(self) -> None:
+        self.layout = None
+        self.apple_map: Optional[np.ndarray] = None
+        self.positions: List[Tuple[int, int]] = []
+        self.values: Optional[Tuple] = None
+        self.tick = 0
+        self.ticks_dropped = 0
+
+    def apply(self, kind: int, payload: bytes) -> None:
+        if kind == LAYOUT:
+            self.layout = unpack_layout(payload, 0)[0]
+            self.apple_map = np.array(self.layout.apple_map)
+        elif kind == DELTA:
+            self.tick, skipped, flags = DELTA_HEAD.unpack_from(payload, 0)
+            self.ticks_dropped += skipped
+            offset = DELTA_HEAD.size
+            for _ in range(payload[offset]):
+                entity, x, y = POSITION.unpack_from(payload, offset + 1)
+                if entity >= len(self.positions):
+                    self.positions.extend([None] * (entity + 1 - len(self.positions)))
+                self.positions[entity] = (x, y)
+                offset += POSITION.size
+            offset += 1
+            if flags & RESET_APPLES:
+                self.apple_map = np.array(self.layout.apple_map)
+            apple_count, = struct.unpack_from("<H", payload, offset)
+            offset += 2
+            for _ in range(apple_count):
+                x, y = XY.unpack_from(payload, offset)
+                self.apple_map[x, y] = 0
+                offset += XY.size
+            if flags & HAS_VALUES:
+                self.values = VALUES_STRUCT.unpack_from(payload, offset)
+
+
+def split_frames(buffer: bytearray):
+    """Вийняти з буфера всі повні кадри (kind, payload); неповний хвіст лишається в буфері."""
+    frames, offset = [], 0
+    while len(buffer) - offset >= FRAME_HEAD.size:
+        size, kind = FRAME_HEAD.unpack_from(buffer, offset)
+        end = offset + FRAME_HEAD.size + size - 1
+        if end > len(buffer):
+            break
+        frames.append((kind, bytes(buffer[offset + FRAME_HEAD.size:end])))
+        offset = end
+    del buffer[:offset]
+    return frames
+
+
+async def watch(game_id=0, host="127.0.0.1", port=DEFAULT_PORT):
+    """
+    Підписатися на гру й віддавати SnapshotDecoder, щойно прочитано нові кадри. Усе, що
+    накопичилось у сокеті, застосовується одразу — повільний глядач бачить лише останній стан.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f"{game_id}\n".encode())
+    decoder = SnapshotDecoder()
+    buffer = bytearray()
+    try:
+        while True:
+            chunk = await reader.read(1 << 16)
+            if not chunk:
+                return
+            buffer += chunk
+            frames = split_frames(buffer)
+            for kind, payload in frames:
+                decoder.apply(kind, payload)
+            if any(kind == DELTA for kind, _ in frames):
+                yield decoder
+    finally:
+        writer.close()
+
+
+async def print_game(game_id, host, port) -> None:
+    last_second = None
+    async for state in watch(game_id, host, port):
+        second = state.tick // 60
+        if second != last_second:
+            last_second = second
+            score, lives, difficulty, deaths, banked_score, is_over = state.values
+            print(f"tick {state.tick}: score {banked_score + score}, lives {lives}, difficulty {difficulty}, "
+                  f"pacman {state.positions[0]}, apples {int((state.apple_map > 0).sum())}, "
+                  f"dropped {state.ticks_dropped}", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сервер безголових ігор Pacman зі стрімом стану по TCP")
+    parser.add_argument("--games", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0, help="seed лабіринту першої гри; далі seed + i. Рух привидів і Pacman бере спільний "
+                             "для всіх ігор процесу random, тож самі партії не відтворювані")
+    parser.add_argument("--map-size", type=int, default=20)
+    parser.add_argument("--ghosts", type=int, default=4)
+    parser.add_argument("--lives", type=int, default=5)
+    parser.add_argument("--ticks-per-second", type=float, default=60, help="темп кожної гри (60 — реальний час)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--watch", type=int, metavar="GAME", help="не запускати сервер, а підписатися на гру GAME")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.watch is not None:
+            asyncio.run(print_game(args.watch, args.host, args.port))
+            return
+
+        # create_game щоразу пересіває глобальний random — seed тут визначає лише лабіринт кожної гри
+        games = {i: create_game(args.map_size, args.ghosts, args.lives, seed=args.seed + i) for i in range(args.games)}
+        print(f"{len(games)} games on {args.host}:{args.port}", file=sys.stderr, flush=True)
+        asyncio.run(GameServer(games, args.ticks_per_second).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
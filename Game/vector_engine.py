@@ -0,0 +1,345 @@
+import numpy as np
+
+from Game.map import Map
+from Game.pathfinding import NextHopTable, NEIGHBOUR_DIRECTION, NO_DIRECTION, UNREACHABLE
+from Agents.ghost import GhostStateShy
+
+# стани привидів (ті самі, що класи в Agents/ghost.py)
+WANDER, CHASE, AMBUSH, CUTOFF, SHY = range(5)
+STATE_NAMES = ["GhostStateWandering", "GhostStateChaseDirect", "GhostStateAmbush", "GhostStateCutOff", "GhostStateShy"]
+
+# ролі в порядку Ghost.ROLE_BY_INDEX
+BLINKY, PINKY, INKY, CLYDE = range(4)
+
+# DIRS-код напрямку -> слот у NEIGHBOUR_ORDER
+DIRECTION_SLOT = np.array([3, 1, 2, 0])
+
+APPLE_POINTS = np.array([0, 10, 50], dtype=np.int64)
+GHOST_FRAME_PERIOD = 5
+PACMAN_FRAME_PERIOD = 60 // 20
+
+
+class VectorizedGames:
+    """
+    K ігор на одному лабіринті, що крокують синхронно. Увесь стан — складені масиви
+    (struct-of-arrays) замість графа об'єктів Game/Ghost/Pacman на кожну гру:
+    клітинки задаються індексами прохідних клітинок NextHopTable.
+
+    Правила ті самі, що в Game.update (привиди кожні 5 кадрів, Pacman кожні 3, рівень —
+    коли яблука скінчились або набрано points_target), але з двома спрощеннями:
+    усі привиди гри крокують одночасно, а Pacman замість A* по полю вартостей іде
+    до найближчого за лабіринтом яблука, штрафуючи клітинки поруч із привидами.
+    """
+
+    def __init__(self, map: Map, num_games, number_of_ghosts=4, lives=5, difficulty=5,
+                 seed=None, restart_on_game_over=False):
+        self.map = map
+        if map.next_hop_table is None and map.size > Map.NEXT_HOP_TABLE_MAX_SIZE:
+            # рушій читає рядки distance/direction для всіх ігор одразу — без повної таблиці не обійтись,
+            # а на великих картах вона займає O(cells^2) пам'яті
+            raise ValueError(f"VectorizedGames needs a NextHopTable; maps above "
+                             f"{Map.NEXT_HOP_TABLE_MAX_SIZE}x{Map.NEXT_HOP_TABLE_MAX_SIZE} are not supported")
+        self.table = map.next_hop_table if map.next_hop_table is not None else NextHopTable(map.map)
+        self.cells = self.table.cells
+        # (V, 4): сусіди у порядку NEIGHBOUR_ORDER та за DIRS-кодом
+        self.neighbours = self.table.neighbours.T.copy()
+        self.step_cell = self.neighbours[:, DIRECTION_SLOT]
+        self.degree = (self.neighbours >= 0).sum(axis=1)
+
+        self.num_games = num_games
+        self.number_of_ghosts = number_of_ghosts
+        self.max_lives = lives
+        self.restart_on_game_over = restart_on_game_over
+        self.points_target_base = 100
+        self.points_target_step = 10
+        self.rng = np.random.default_rng(seed)
+
+        ghost_numbers = np.arange(number_of_ghosts)
+        self.roles = ghost_numbers % 4
+        room = [self.table.index[position] for position in map.get_ghost_room_positions()]
+        self.room_cells = np.array(room)[ghost_numbers % 4]
+        # у стан SHY переходить лише clyde (n % 4 == 3), і Ghost.randomize_state дає йому кут "br"
+        corner = self.table.index[GhostStateShy(1, "br")._corner_target(map)]
+        self.corner_cells = np.full(number_of_ghosts, corner)
+
+        self.initial_apples = map.apple_map_copy[self.cells[:, 0], self.cells[:, 1]].astype(np.int8)
+
+        shape = (num_games, number_of_ghosts)
+        self.frame = np.zeros(num_games, dtype=np.int64)
+        self.difficulty = np.full(num_games, difficulty, dtype=np.int64)
+        self.points_target = np.zeros(num_games, dtype=np.int64)
+        self.score = np.zeros(num_games, dtype=np.int64)
+        self.banked_score = np.zeros(num_games, dtype=np.int64)
+        self.lives = np.full(num_games, lives, dtype=np.int64)
+        self.deaths = np.zeros(num_games, dtype=np.int64)
+        self.is_over = np.zeros(num_games, dtype=bool)
+
+        self.apples = np.tile(self.initial_apples, (num_games, 1))
+        self.apples_left = np.count_nonzero(self.apples, axis=1)
+
+        self.pacman_cell = np.zeros(num_games, dtype=np.int64)
+        self.pacman_direction = np.zeros(num_games, dtype=np.int64)
+        self.did_die = np.zeros(num_games, dtype=bool)
+
+        self.ghost_cell = np.zeros(shape, dtype=np.int64)
+        self.ghost_prev = np.full(shape, -1, dtype=np.int64)
+        self.ghost_direction = np.zeros(shape, dtype=np.int64)
+        self.ghost_state = np.zeros(shape, dtype=np.int64)
+        self.ghost_ticks = np.zeros(shape, dtype=np.int64)
+
+        self._restart(np.ones(num_games, dtype=bool))
+
+    # -------- скидання --------
+    def _wander_ticks(self, difficulty):
+        return np.maximum(10 - difficulty, 4) + self.rng.integers(0, 5, size=difficulty.shape)
+
+    def _restore_agents(self, games):
+        """Ghost.restore + Pacman.restore_without_lives + Game.reset_positions для вибраних ігор."""
+        idx = np.nonzero(games)[0]
+        if len(idx) == 0:
+            return
+        d = np.repeat(self.difficulty[idx, None], self.number_of_ghosts, axis=1)
+        self.ghost_cell[idx] = self.room_cells
+        self.ghost_prev[idx] = -1
+        self.ghost_direction[idx] = 0
+        self.ghost_state[idx] = WANDER
+        self.ghost_ticks[idx] = self._wander_ticks(d)
+
+        # випадкова вільна клітинка, не зайнята привидом
+        pacman = self.rng.integers(0, len(self.cells), size=len(idx))
+        clash = (self.ghost_cell[idx] == pacman[:, None]).any(axis=1)
+        while clash.any():
+            pacman[clash] = self.rng.integers(0, len(self.cells), size=int(clash.sum()))
+            clash = (self.ghost_cell[idx] == pacman[:, None]).any(axis=1)
+        self.pacman_cell[idx] = pacman
+        self.pacman_direction[idx] = 0
+        self.did_die[idx] = False
+
+    def _restart(self, games):
+        """Game.restart_game для вибраних ігор: свіжі яблука, очки й життя, frame = 0."""
+        self.apples[games] = self.initial_apples
+        self.apples_left[games] = np.count_nonzero(self.initial_apples)
+        self.score[games] = 0
+        self.lives[games] = self.max_lives
+        self.frame[games] = 0
+        self.points_target[games] = self.points_target_base + (self.difficulty[games] - 1) * self.points_target_step
+        self._restore_agents(games)
+
+    def _next_level(self, games):
+        self.banked_score[games] += self.score[games]
+        self.difficulty[games] += 1
+        self._restart(games)
+
+    # -------- привиди --------
+    def _state_weights(self, difficulty):
+        """Ваги Ghost.randomize_state: (ігри, ролі, стани)."""
+        d = np.maximum(1, difficulty)
+        strong, weak, wander = 3 + d, 1 + d // 2, np.maximum(1, 5 - d)
+        one, zero = np.ones_like(d), np.zeros_like(d)
+        weights = np.stack([
+            #          WANDER  CHASE  AMBUSH  CUTOFF  SHY
+            np.stack([wander, strong, weak, weak, zero], axis=-1),   # blinky
+            np.stack([wander, weak, strong, weak, zero], axis=-1),   # pinky
+            np.stack([wander, weak, weak, strong, zero], axis=-1),   # inky
+            np.stack([wander, weak, one, zero, strong], axis=-1),    # clyde
+        ], axis=1)
+        return weights
+
+    def _ticks_for_state(self, state, difficulty):
+        d = np.maximum(1, difficulty)
+        ticks = self._wander_ticks(d)
+        ticks = np.where(state == CHASE, np.minimum(5 + d, 9), ticks)
+        ticks = np.where((state == AMBUSH) | (state == CUTOFF), np.minimum(4 + d, 8), ticks)
+        ticks = np.where(state == SHY, np.minimum(5 + d, 9), ticks)
+        return ticks
+
+    def _randomize_states(self, idx, switch):
+        games, ghosts = np.nonzero(switch)
+        if len(games) == 0:
+            return
+        difficulty = self.difficulty[idx[games]]
+        weights = self._state_weights(difficulty)[np.arange(len(games)), self.roles[ghosts]]
+        cumulative = np.cumsum(weights, axis=1)
+        pick = self.rng.random(len(games)) * cumulative[:, -1]
+        state = (cumulative > pick[:, None]).argmax(axis=1)
+        self.ghost_state[idx[games], ghosts] = state
+        self.ghost_ticks[idx[games], ghosts] = self._ticks_for_state(state, difficulty)
+
+    def _random_neighbour(self, cell, avoid):
+        """Випадковий прохідний сусід; avoid відкидається, якщо є альтернатива."""
+        candidates = self.neighbours[cell]
+        valid = candidates >= 0
+        count = valid.sum(axis=-1)
+        skip = (candidates == avoid[..., None]) & (count > 1)[..., None]
+        valid &= ~skip
+        keys = np.where(valid, self.rng.random(candidates.shape), -1.0)
+        slot = keys.argmax(axis=-1)
+        chosen = np.take_along_axis(candidates, slot[..., None], axis=-1)[..., 0]
+        moved = valid.any(axis=-1)
+        return np.where(moved, chosen, cell), np.where(moved, NEIGHBOUR_DIRECTION[slot], -1)
+
+    def _ahead_of_pacman(self, pacman, direction, k):
+        """GhostStateAmbush._ahead_of_pac: k клітинок попереду, ближче, якщо там стіна."""
+        dx, dy = np.array([(0, 1), (1, 0), (0, -1), (-1, 0)]).T[:, direction]
+        px, py = self.cells[pacman, 0], self.cells[pacman, 1]
+        target = pacman.copy()
+        # дальша прохідна клітинка перекриває ближчу
+        for step in range(1, k + 1):
+            ax, ay = px + step * dx, py + step * dy
+            inside = (ax >= 0) & (ax < self.map.size) & (ay >= 0) & (ay < self.map.size)
+            cell = np.full(len(pacman), -1)
+            cell[inside] = self.table.index[ax[inside], ay[inside]]
+            target = np.where(cell >= 0, cell, target)
+        return target
+
+    def _cut_point(self, pacman, direction):
+        """GhostStateCutOff._pick_cut: до 5 клітинок уперед до першого розгалуження."""
+        current = pacman.copy()
+        done = np.zeros(len(pacman), dtype=bool)
+        for _ in range(5):
+            nxt = self.step_cell[current, direction]
+            done |= nxt < 0
+            current = np.where(done, current, nxt)
+            done |= self.degree[current] >= 3
+        return current
+
+    def _move_ghosts(self, games):
+        idx = np.nonzero(games)[0]
+        cell = self.ghost_cell[idx]
+        pacman = self.pacman_cell[idx]
+        direction = self.pacman_direction[idx]
+        state = self.ghost_state[idx]
+        self.ghost_ticks[idx] -= 1
+
+        target = np.full(cell.shape, -1)
+        target = np.where(state == CHASE, pacman[:, None], target)
+        target = np.where(state == AMBUSH, self._ahead_of_pacman(pacman, direction, 2)[:, None], target)
+        target = np.where(state == CUTOFF, self._cut_point(pacman, direction)[:, None], target)
+
+        # Clyde: близько — у свій куток, далеко — навпіл переслідує або блукає
+        distance = np.abs(self.cells[cell] - self.cells[pacman][:, None]).sum(axis=-1)
+        shy = state == SHY
+        shy_chase = shy & (distance > 4) & (self.rng.random(cell.shape) < 0.5)
+        target = np.where(shy & (distance <= 4), self.corner_cells[None, :], target)
+        target = np.where(shy_chase, pacman[:, None], target)
+        shy_wander = shy & (distance > 4) & ~shy_chase
+
+        wander_cell, wander_direction = self._random_neighbour(cell, np.where(shy_wander, -1, self.ghost_prev[idx]))
+
+        has_target = target >= 0
+        code = np.full(cell.shape, NO_DIRECTION)
+        code[has_target] = self.table.direction[cell[has_target], target[has_target]]
+        chase_moved = code != NO_DIRECTION
+        chase_cell = np.where(chase_moved, self.step_cell[cell, np.where(chase_moved, code, 0)], cell)
+
+        wanders = (state == WANDER) | shy_wander
+        new_cell = np.where(wanders, wander_cell, chase_cell)
+        new_direction = np.where(wanders, wander_direction, np.where(chase_moved, code, -1))
+        new_direction = np.where(new_direction >= 0, new_direction, self.ghost_direction[idx])
+
+        self.ghost_prev[idx] = cell
+        self.ghost_cell[idx] = new_cell
+        self.ghost_direction[idx] = new_direction
+
+        # GhostStateBaseMove._collision_check: привид на клітинці Pacman
+        caught = new_cell == pacman[:, None]
+        self._randomize_states(idx, (self.ghost_ticks[idx] <= 0) & ~caught)
+
+        caught_games = np.zeros(self.num_games, dtype=bool)
+        caught_games[idx] = caught.any(axis=1)
+        self.did_die |= caught_games
+        return caught_games
+
+    # -------- Pacman --------
+    def _move_pacman(self, games):
+        idx = np.nonzero(games)[0]
+        pacman = self.pacman_cell[idx]
+
+        # найближче за лабіринтом яблуко
+        distance = self.table.distance[pacman].astype(np.int64)
+        distance[self.apples[idx] == 0] = UNREACHABLE + 1
+        target = distance.argmin(axis=1)
+
+        candidates = self.neighbours[pacman]
+        ghosts = self.ghost_cell[idx]
+        valid = (candidates >= 0) & ~(candidates[:, :, None] == ghosts[:, None, :]).any(axis=2)
+        safe_candidates = np.where(valid, candidates, 0)
+
+        # ті самі доданки за привидів, що й у Map.get_pacman_cost
+        ghost_distance = np.abs(self.cells[safe_candidates][:, :, None, :] - self.cells[ghosts][:, None, :, :]).sum(axis=-1)
+        penalty = (2 / (ghost_distance + 1)).sum(axis=-1) + 10 * (ghost_distance <= 2).sum(axis=-1)
+        cost = self.table.distance[safe_candidates, target[:, None]] + penalty
+        cost = np.where(valid, cost, np.inf)
+
+        slot = cost.argmin(axis=1)
+        stuck = ~valid.any(axis=1)
+        new_cell = np.where(stuck, pacman, candidates[np.arange(len(idx)), slot])
+        self.pacman_direction[idx] = np.where(stuck, self.pacman_direction[idx], NEIGHBOUR_DIRECTION[slot])
+        self.pacman_cell[idx] = new_cell
+        self.did_die[idx] |= stuck
+
+        # Map.try_eat_apple + PacmanStateBaseMove.handle_apple
+        apple = self.apples[idx, new_cell]
+        self.score[idx] += APPLE_POINTS[apple]
+        self.apples[idx, new_cell] = 0
+        self.apples_left[idx] -= apple > 0
+
+    def _transitions(self, games):
+        level = games & ((self.apples_left == 0) | (self.score >= self.points_target))
+        self._next_level(level)
+
+        died = games & ~level & self.did_die
+        self.lives[died] -= 1
+        self.deaths[died] += 1
+        over = died & (self.lives == 0)
+        if self.restart_on_game_over:
+            self._restart(over)
+        else:
+            self.is_over |= over
+        self._restore_agents(died & ~over)
+
+    # -------- API --------
+    def step(self):
+        """Один кадр для всіх ігор, що ще тривають (аналог Game.tick)."""
+        active = ~self.is_over
+        self.frame[active] += 1
+
+        caught = np.zeros(self.num_games, dtype=bool)
+        ghost_games = active & (self.frame % GHOST_FRAME_PERIOD == 0)
+        if ghost_games.any():
+            caught = self._move_ghosts(ghost_games)
+
+        # як у Game.update: після зловлення кадр закінчується до ходу Pacman
+        pacman_games = active & ~caught & (self.frame % PACMAN_FRAME_PERIOD == 0)
+        if pacman_games.any():
+            self._move_pacman(pacman_games)
+            self._transitions(pacman_games)
+
+    def run(self, ticks):
+        for _ in range(ticks):
+            if self.is_over.all():
+                break
+            self.step()
+        return self.results()
+
+    def total_scores(self):
+        return self.banked_score + self.score
+
+    def pacman_positions(self):
+        return self.cells[self.pacman_cell]
+
+    def ghost_positions(self):
+        return self.cells[self.ghost_cell]
+
+    def apple_grid(self, game):
+        grid = np.zeros((self.map.size, self.map.size))
+        grid[self.cells[:, 0], self.cells[:, 1]] = self.apples[game]
+        return grid
+
+    def results(self):
+        return {
+            "score": self.total_scores(),
+            "level": self.difficulty.copy(),
+            "deaths": self.deaths.copy(),
+            "game_over": self.is_over.copy(),
+        }
@@ -0,0 +1,5 @@
+from Game.batch import main
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from Game.game import Game
+from Game.map import Map
+from Game.map_generator import MapGenerator
+from Game.pathfinding import FlowField
+from Agents.ghost import Ghost
+from Agents.pacman import Pacman
+
+DEFAULT_SIZES = [20, 50, 100, 200]
+DEFAULT_GHOSTS = [4, 16, 64]
+DEFAULT_TOLERANCE = 0.25
+
+
+def measure(function, min_calls=3, max_calls=200, budget=0.5):
+    """Викликати function, доки не вичерпано budget секунд (але не менше min_calls разів)."""
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < max_calls:
+        t = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - t)
+        if len(timings) >= min_calls and time.perf_counter() - started >= budget:
+            break
+    return {
+        "calls": len(timings),
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+    }
+
+
+def free_cells(game_map):
+    return [tuple(int(v) for v in cell) for cell in np.argwhere(game_map.map == 0)]
+
+
+def bench_generation(game_map, seed, budget):
+    room_positions = game_map.get_ghost_room_positions()
+
+    def generate():
+        MapGenerator(game_map.size, seed).generate_map(room_positions)
+
+    return measure(generate, budget=budget)
+
+
+def bench_map_and_game(game_map, number_of_ghosts, seed, budget, ticks):
+    """Вибірки для однієї пари (розмір, кількість привидів); усе детерміновано seed."""
+    game_map.restore_map()
+    random.seed(seed)
+    game = Game(game_map, [Ghost(i) for i in range(number_of_ghosts)], Pacman(5))
+    # гра мусить іти далі незалежно від того, що сталося за час вимірювань
+    game.restart_on_game_over = True
+
+    rng = random.Random(seed)
+    cells = free_cells(game_map)
+    pairs = [(rng.choice(cells), rng.choice(cells)) for _ in range(64)]
+
+    def next_pair():
+        return pairs[rng.randrange(len(pairs))]
+
+    results = {}
+
+    def bfs():
+        start, finish = next_pair()
+        game_map.bfs(start, finish, game_map.get_free_neighbours_for_ghost)
+    results["bfs"] = measure(bfs, budget=budget)
+
+    def flow_field():
+        _, finish = next_pair()
+        FlowField(game_map.adjacency, finish)
+    results["flow_field"] = measure(flow_field, budget=budget)
+
+    game_map.update_pacman_cost_field()
+
+    def dijkstra():
+        start, finish = next_pair()
+        game_map.dijkstra(start, finish, game_map.get_pacman_cost)
+    results["dijkstra"] = measure(dijkstra, budget=budget)
+
+    results["pacman_cost_field"] = measure(game_map.update_pacman_cost_field, budget=budget)
+
+    def get_pacman_cost():
+        for cell in cells:
+            game_map.get_pacman_cost(cell)
+    results["get_pacman_cost"] = measure(get_pacman_cost, budget=budget)
+    results["get_pacman_cost"]["per_tile"] = results["get_pacman_cost"]["median"] / len(cells)
+
+    def get_best_apple():
+        game_map.get_best_apple(rng.choice(cells))
+    results["get_best_apple"] = measure(get_best_apple, budget=budget)
+
+    # повний тік без вікна: беремо ticks кадрів поспіль, щоб були й кроки привидів, і Pacman
+    def game_ticks():
+        for _ in range(ticks):
+            game.tick()
+    results["game_tick"] = measure(game_ticks, min_calls=1, budget=budget)
+    for key in ("min", "median", "mean"):
+        results["game_tick"][key] /= ticks
+    results["game_tick"]["ticks_per_call"] = ticks
+
+    return results
+
+
+def run_suite(sizes, ghost_counts, seed, budget, ticks, log=print):
+    results = []
+    for size in sizes:
+        log(f"size {size}: generate_map")
+        game_map = Map(size, seed)
+        entry = {"name": "generate_map", "size": size, "ghosts": None}
+        entry.update(bench_generation(game_map, seed, budget))
+        if game_map.next_hop_table is not None:
+            log(game_map.next_hop_table.memory_report())
+            entry["next_hop_table_bytes"] = game_map.next_hop_table.nbytes
+        results.append(entry)
+
+        for number_of_ghosts in ghost_counts:
+            log(f"size {size}, ghosts {number_of_ghosts}")
+            for name, timing in bench_map_and_game(game_map, number_of_ghosts, seed, budget, ticks).items():
+                entry = {"name": name, "size": size, "ghosts": number_of_ghosts}
+                entry.update(timing)
+                results.append(entry)
+    return results
+
+
+def case_key(entry):
+    return entry["name"], entry["size"], entry["ghosts"]
+
+
+def compare(results, baseline, tolerance):
+    """Повернути список регресій: медіана гірша за базову більш ніж на tolerance."""
+    base = {case_key(entry): entry for entry in baseline["results"]}
+    regressions = []
+    for entry in results:
+        old = base.get(case_key(entry))
+        if old is None:
+            continue
+        ratio = entry["median"] / old["median"] if old["median"] > 0 else float("inf")
+        entry["baseline_median"] = old["median"]
+        entry["ratio"] = ratio
+        if ratio > 1 + tolerance:
+            regressions.append(entry)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарки пошуку шляху, вартостей, генерації карт і тіку гри")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--ghosts", type=int, nargs="+", default=DEFAULT_GHOSTS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--budget", type=float, default=0.5, help="секунд на один випадок (мінімум 3 виклики)")
+    parser.add_argument("--ticks", type=int, default=15, help="кадрів за один вимір game_tick")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="JSON попереднього прогону; регресії — ненульовий код виходу")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    log = lambda message: print(message, file=sys.stderr, flush=True)
+    results = run_suite(args.sizes, args.ghosts, args.seed, args.budget, args.ticks, log)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "budget": args.budget,
+            "ticks": args.ticks,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        report["meta"]["baseline"] = args.baseline
+        report["meta"]["tolerance"] = args.tolerance
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for entry in results:
+        line = f"{entry['name']:<18} size={entry['size']:<4} ghosts={str(entry['ghosts']):<5} median={entry['median'] * 1000:9.3f} ms"
+        if "ratio" in entry:
+            line += f"  x{entry['ratio']:.2f} vs baseline"
+        print(line)
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.tolerance:.0%}:")
+        for entry in regressions:
+            print(f"  {entry['name']} size={entry['size']} ghosts={entry['ghosts']}: x{entry['ratio']:.2f}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
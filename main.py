@@ -6,10 +6,11 @@ import pyglet
 pyglet.options['gl_profile'] = 'compatibility'   # щоб уникнути core-profile сюрпризів
 # pyglet.options['debug_gl'] = True              # за потреби: детальні GL-логи
 
-from Game.game import Game
-from Game.map import Map
-from Agents.ghost import Ghost
-from Agents.pacman import Pacman
+from Game.clock import SimulationClock
+from Game.game import create_game
+from Game.prefetch import MapPrefetcher
+from Game.replay import ReplayRecorder
+from Game.renderer import GameRenderer, MapImages
 
 
 def texture_set_mag_filter_nearest(texture):
@@ -24,19 +25,29 @@ def start_game():
 
     TILE_SIZE = 22
     MAP_SIZE = 20
+    NUMBER_OF_GHOSTS = 4
+    LIVES = 5
+    NEW_MAZE_EACH_LEVEL = True
+    # напр. "last_game.pacreplay" — детермінований лог сесії (python -m Game.replay FILE --verify)
+    REPLAY_FILE = None
 
     # Коректно виставляємо робочу папку до каталогу зі скриптом
     base_dir = os.path.abspath(os.path.dirname(__file__))
     assets_dir = os.path.join(base_dir, "sprites")
 
-    # 1) СПЕРШУ — СТВОРЮЄМО ВІКНО (щоб уже був GL-контекст)
-    #   Розмір коробки поки тимчасовий; після створення об'єктів ми підженемо його, якщо потрібно.
-    temp_width = MAP_SIZE * TILE_SIZE
-    temp_height = MAP_SIZE * TILE_SIZE
-    window = pyglet.window.Window(width=temp_width, height=temp_height, vsync=True, caption="Pacman")
+    # 1) СПЕРШУ — СИМУЛЯЦІЯ: карта, агенти, гра (жодного pyglet, можна й без вікна)
+    game = create_game(MAP_SIZE, NUMBER_OF_GHOSTS, LIVES)
+    if NEW_MAZE_EACH_LEVEL:
+        # наступний лабіринт генерується у фоновому процесі, поки йде рівень
+        game.map_prefetcher = MapPrefetcher(MAP_SIZE)
+
+    # 2) ВІКНО — одразу під реальний розмір карти (щоб уже був GL-контекст)
+    win_w = game.map.size * TILE_SIZE
+    win_h = game.map.size * TILE_SIZE
+    window = pyglet.window.Window(width=win_w, height=win_h, vsync=True, caption="Pacman")
     pyglet.gl.glClearColor(0, 0, 0, 1)
 
-    # 2) ТЕПЕР — ЗАВАНТАЖУЄМО СПРАЙТИ/ТЕКСТУРИ (GL-контекст уже є)
+    # 3) ТЕПЕР — ЗАВАНТАЖУЄМО СПРАЙТИ/ТЕКСТУРИ (GL-контекст уже є)
     wall_image = pyglet.image.load(os.path.join(assets_dir, 'wall.png'))
     texture_set_mag_filter_nearest(wall_image.get_texture())
 
@@ -56,10 +67,7 @@ def start_game():
     for image in pacman_images:
         texture_set_mag_filter_nearest(image.get_texture())
 
-    # 3) СТВОРЮЄМО КАРТУ/ГРУ
-    game_map = Map(wall_image, small_apple_image, big_apple_image, MAP_SIZE, TILE_SIZE)
-
-    NUMBER_OF_GHOSTS = 4
+    # 4) РЕНДЕРЕР — необов'язковий вигляд поверх гри
     GHOST_COLORS = [
         (255, 0, 0),
         (255, 183, 255),
@@ -69,17 +77,17 @@ def start_game():
         (12, 183, 81)
     ]
 
-    ghosts = []
+    ghost_sprites = []
     for i in range(NUMBER_OF_GHOSTS):
-        ghost_sprites = []
+        sprites = []
         for j in range(4):
             ghost_image = ghost_images[j]
             ghost_sprite = pyglet.sprite.Sprite(img=ghost_image)
             ghost_sprite.color = GHOST_COLORS[i]
             ghost_sprite.width = TILE_SIZE
             ghost_sprite.height = TILE_SIZE
-            ghost_sprites.append(ghost_sprite)
-        ghosts.append(Ghost(ghost_sprites, i))
+            sprites.append(ghost_sprite)
+        ghost_sprites.append(sprites)
 
     pacman_sprites = []
     for i in range(4):
@@ -89,24 +97,24 @@ def start_game():
         pacman_sprite.height = TILE_SIZE
         pacman_sprites.append(pacman_sprite)
 
-    LIVES = 5
-    pacman = Pacman(pacman_sprites, LIVES)
-
-    game = Game(game_map, ghosts, pacman)
-
-    # 4) ПІДГОНЯЄМО РОЗМІР ВІКНА ПІД РЕАЛЬНУ КАРТУ (якщо Map має точний size)
-    win_w = game.map.size * TILE_SIZE
-    win_h = game.map.size * TILE_SIZE
-    if (win_w, win_h) != (temp_width, temp_height):
-        window.set_size(win_w, win_h)
+    map_images = MapImages(wall_image, small_apple_image, big_apple_image)
+    # множник швидкості симуляції: +/- змінюють, 0 — назад до x1
+    clock = SimulationClock(game)
+    renderer = GameRenderer(game, map_images, ghost_sprites, pacman_sprites, TILE_SIZE, clock)
 
     # Entity movement seed
     random.seed()
 
+    recorder = None
+    if REPLAY_FILE is not None:
+        # пересіює random і перезапускає гру — далі все відтворюється з логу
+        recorder = ReplayRecorder(game, REPLAY_FILE)
+        recorder.start()
+
     @window.event
     def on_draw():
         window.clear()
-        game.on_draw(TILE_SIZE)
+        renderer.on_draw()
 
     @window.event
     def on_key_press(symbol, modifiers):
@@ -117,17 +125,29 @@ def start_game():
         elif symbol == pyglet.window.key.SPACE:
             game.is_updating = not game.is_updating
         elif symbol == pyglet.window.key.P:
-            game.show_pacman_costs = not game.show_pacman_costs
+            renderer.show_pacman_costs = not renderer.show_pacman_costs
+        elif symbol == pyglet.window.key.H:
+            renderer.cost_overlay.next_mode()
+        elif symbol == pyglet.window.key.F:
+            renderer.toggle_profiler()
+        elif symbol in (pyglet.window.key.PLUS, pyglet.window.key.EQUAL, pyglet.window.key.NUM_ADD):
+            clock.faster()
+        elif symbol in (pyglet.window.key.MINUS, pyglet.window.key.NUM_SUBTRACT):
+            clock.slower()
+        elif symbol in (pyglet.window.key._0, pyglet.window.key.NUM_0):
+            clock.set_speed(1)
 
     def update(dt):
-        if not game.is_updating:
-            return
-        game.frame += 1
-        game.update(dt)
+        clock.advance(dt)
 
     pyglet.clock.schedule_interval(update, 1/60.0)
     pyglet.app.run()
 
+    if recorder is not None:
+        recorder.close()
+    if game.map_prefetcher is not None:
+        game.map_prefetcher.close()
+
 
 if __name__ == "__main__":
     start_game()
@@ -0,0 +1,33 @@
+import numpy as np
+
+from Game.adjacency import AdjacencyIndex
+from Game.pathfinding import FlowField
+
+
+def serpentine(size):
+    """Один коридор змійкою: прохідні рядки через один, з'єднані по черзі то справа, то зліва."""
+    walls = np.ones((size, size), dtype=int)
+    walls[::2, :] = 0
+    for row in range(1, size - 1, 2):
+        walls[row, size - 1 if row % 4 == 1 else 0] = 0
+    return walls
+
+
+def test_path_longer_than_uint16():
+    walls = serpentine(384)
+    adjacency = AdjacencyIndex(walls)
+    assert len(adjacency.open_cells) > 65535
+
+    field = FlowField(adjacency, (0, 0))
+    end = (382, 0) if (382 // 2) % 2 == 1 else (382, 383)
+    distance = field.get_distance(end)
+    assert distance == len(adjacency.open_cells) - 1
+    assert distance > 65535
+    assert field.next_step(end) is not None
+
+
+def test_small_map_stays_uint16():
+    walls = serpentine(20)
+    field = FlowField(AdjacencyIndex(walls), (0, 0))
+    assert field.distance.typecode == "H"
+    assert field.get_distance((1, 1)) is None
@@ -0,0 +1,30 @@
+from Game.game import create_game
+from Game.map import Map
+from Game.profiler import TickProfiler
+
+
+def samples(profiler, phase):
+    buffer = profiler.phases.get(phase)
+    return 0 if buffer is None else len(buffer.recent())
+
+
+def test_map_timers_follow_replace_map():
+    game = create_game(20, 4, 5, seed=1)
+    profiler = TickProfiler(capacity=10000)
+    profiler.attach(game)
+
+    old_map = game.map
+    game.replace_map(Map(20, 2))
+    game.restart_game()
+    before = {phase: samples(profiler, phase) for phase in ("pacman.cost_field", "apple_check")}
+    for _ in range(60):
+        game.tick()
+
+    assert samples(profiler, "pacman.cost_field") > before["pacman.cost_field"]
+    assert samples(profiler, "apple_check") > before["apple_check"]
+    assert "update_pacman_cost_field" not in vars(old_map)
+
+    profiler.detach()
+    assert "update_pacman_cost_field" not in vars(game.map)
+    assert "is_apple_map_empty" not in vars(game.map)
+    assert profiler not in game.map.listeners
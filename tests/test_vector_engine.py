@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from Game.map import Map
+from Game.vector_engine import VectorizedGames
+
+
+def test_builds_when_corners_are_walled():
+    # seed 0: усі чотири кути (1, 1), (1, size - 2), ... — стіни
+    game_map = Map(20, 0)
+    assert game_map.map[1, 1] == 1 and game_map.map[1, 18] == 1 and game_map.map[18, 1] == 1
+
+    games = VectorizedGames(game_map, num_games=8, number_of_ghosts=8, seed=0)
+    assert (games.corner_cells >= 0).all()
+    x, y = games.cells[games.corner_cells[0]]
+    assert game_map.map[x, y] == 0
+
+    games.run(300)
+    assert np.all(games.total_scores() >= 0)
+
+
+def test_rejects_maps_without_next_hop_table():
+    game_map = Map(Map.NEXT_HOP_TABLE_MAX_SIZE + 2, 1)
+    assert game_map.next_hop_table is None
+    with pytest.raises(ValueError):
+        VectorizedGames(game_map, num_games=2)